@@ -1,6 +1,10 @@
 """Authentication module — API Key + JWT auth + RBAC."""
 
+import asyncio
+import hashlib
+import hmac
 import secrets
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 
 import bcrypt
@@ -9,49 +13,153 @@ from fastapi import Depends, Header, HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from .cache import TTLCache
 from .config import settings
 from .database import get_db
 from .models.user import User
 
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRE_HOURS = 24
+# "sr2_" plus 8 random characters — enough to make prefix collisions negligible
+API_KEY_PREFIX_LEN = 12
+# Keys issued before prefixes were stored: "sr_" plus 43 base64url characters.
+# New keys start with "sr2_", so they never reach the legacy scan.
+_LEGACY_KEY_PREFIX = "sr_"
+_LEGACY_KEY_LEN = 46
 
+# Verified API keys (by keyed digest) -> (user_id, key prefix); skips bcrypt on repeat requests
+_credential_cache = TTLCache(maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL)
+# Keys that matched no legacy user; spares repeated scans for typos and revoked keys
+_legacy_misses = TTLCache(maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.AUTH_CACHE_TTL)
+# user_id -> (token_epoch, detached User snapshot); lets valid JWTs skip the users query.
+# Other workers learn of a role change or disable only when their entry expires,
+# so the TTL is short: it bounds how long a revoked JWT keeps working there.
+_token_epochs = TTLCache(maxsize=settings.AUTH_CACHE_SIZE, ttl=settings.TOKEN_EPOCH_TTL)
 
-def hash_api_key(api_key: str) -> str:
-    return bcrypt.hashpw(api_key.encode(), bcrypt.gensalt()).decode()
 
+# bcrypt is deliberately slow; run it off the event loop with a bounded worker count
+_hash_executor = ThreadPoolExecutor(max_workers=settings.HASH_MAX_WORKERS, thread_name_prefix="bcrypt")
+_hash_in_flight = 0
+_hash_completed = 0
 
-def verify_api_key(api_key: str, hashed: str) -> bool:
-    return bcrypt.checkpw(api_key.encode(), hashed.encode())
+
+async def _run_bcrypt(fn, *args):
+    global _hash_in_flight, _hash_completed
+    _hash_in_flight += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, fn, *args)
+    finally:
+        _hash_in_flight -= 1
+        _hash_completed += 1
+
+
+def hash_pool_stats() -> dict:
+    return {
+        "max_workers": settings.HASH_MAX_WORKERS,
+        "in_flight": _hash_in_flight,
+        "queued": max(0, _hash_in_flight - settings.HASH_MAX_WORKERS),
+        "completed": _hash_completed,
+    }
+
+
+def _hashpw(secret: str) -> str:
+    return bcrypt.hashpw(secret.encode(), bcrypt.gensalt()).decode()
+
+
+def _checkpw(secret: str, hashed: str) -> bool:
+    return bcrypt.checkpw(secret.encode(), hashed.encode())
+
+
+async def hash_api_key(api_key: str) -> str:
+    return await _run_bcrypt(_hashpw, api_key)
 
 
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+async def verify_api_key(api_key: str, hashed: str) -> bool:
+    return await _run_bcrypt(_checkpw, api_key, hashed)
 
 
-def verify_password(password: str, hashed: str) -> bool:
-    return bcrypt.checkpw(password.encode(), hashed.encode())
+async def hash_password(password: str) -> str:
+    return await _run_bcrypt(_hashpw, password)
+
+
+async def verify_password(password: str, hashed: str) -> bool:
+    return await _run_bcrypt(_checkpw, password, hashed)
 
 
 def generate_api_key() -> str:
-    return "sr_" + secrets.token_urlsafe(32)
+    return "sr2_" + secrets.token_urlsafe(32)
+
+
+def api_key_prefix(api_key: str) -> str:
+    """Return the non-secret lookup prefix stored alongside the key hash."""
+    return api_key[:API_KEY_PREFIX_LEN]
+
+
+def _may_be_legacy(api_key: str) -> bool:
+    return (
+        settings.LEGACY_API_KEYS
+        and len(api_key) == _LEGACY_KEY_LEN
+        and api_key.startswith(_LEGACY_KEY_PREFIX)
+    )
+
+
+def _credential_digest(api_key: str) -> str:
+    return hmac.new(settings.SECRET_KEY.encode(), api_key.encode(), hashlib.sha256).hexdigest()
+
+
+def invalidate_credentials(user_id: int) -> None:
+    """Forget cached API key verifications for a user (key, role or status changed)."""
+    _credential_cache.discard_where(lambda cached: cached[0] == user_id)
 
 
-def create_jwt_token(user_id: int) -> str:
+def credential_cache_stats() -> dict:
+    return _credential_cache.stats()
+
+
+def _snapshot(user: User) -> User:
+    """Copy the loaded columns into a transient User safe to share across requests."""
+    return User(
+        id=user.id,
+        username=user.username,
+        display_name=user.display_name,
+        email=user.email,
+        role=user.role,
+        is_active=user.is_active,
+        token_epoch=user.token_epoch,
+        created_at=user.created_at,
+        updated_at=user.updated_at,
+    )
+
+
+def note_token_epoch(user: User) -> None:
+    """Refresh the in-memory epoch table after a user's role or status changed."""
+    if user.is_active:
+        _token_epochs.set(user.id, (user.token_epoch, _snapshot(user)))
+    else:
+        _token_epochs.pop(user.id)
+
+
+def token_epoch_stats() -> dict:
+    return _token_epochs.stats()
+
+
+def create_jwt_token(user: User) -> str:
     """Create a short-lived JWT for frontend sessions."""
     payload = {
-        "sub": str(user_id),
+        "sub": str(user.id),
+        "role": user.role,
+        "epoch": user.token_epoch or 0,
         "exp": datetime.now(timezone.utc) + timedelta(hours=JWT_EXPIRE_HOURS),
     }
     return jwt.encode(payload, settings.SECRET_KEY, algorithm=JWT_ALGORITHM)
 
 
-def decode_jwt_token(token: str) -> int | None:
-    """Decode JWT and return user_id, or None if invalid/expired."""
+def decode_jwt_token(token: str) -> tuple[int, int] | None:
+    """Decode JWT and return (user_id, token_epoch), or None if invalid/expired."""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[JWT_ALGORITHM])
-        return int(payload["sub"])
-    except (jwt.ExpiredSignatureError, jwt.InvalidTokenError, KeyError, ValueError):
+        return int(payload["sub"]), int(payload.get("epoch", 0))
+    except (jwt.ExpiredSignatureError, jwt.InvalidTokenError, KeyError, ValueError, TypeError):
         return None
 
 
@@ -65,13 +173,20 @@ async def get_current_user(
     # --- Path 1: JWT Bearer token (frontend) ---
     if authorization and authorization.startswith("Bearer "):
         token = authorization[7:]
-        user_id = decode_jwt_token(token)
-        if user_id is not None:
+        claims = decode_jwt_token(token)
+        if claims is not None:
+            user_id, epoch = claims
+            # Fast path — epoch matches the table, no DB round trip
+            known = _token_epochs.get(user_id)
+            if known and known[0] == epoch:
+                return known[1]
+
             result = await db.execute(
                 select(User).where(User.id == user_id, User.is_active == True)  # noqa: E712
             )
             user = result.scalar_one_or_none()
-            if user:
+            if user and user.token_epoch == epoch:
+                note_token_epoch(user)
                 return user
 
     # --- Path 2: API Key (CLI / env admin key) ---
@@ -88,15 +203,49 @@ async def get_current_user(
             if admin:
                 return admin
 
-        # Check hashed keys in DB
+        # Recently verified key — skip bcrypt, but still honour is_active. Another
+        # worker may have regenerated the key, which replaces the stored prefix.
+        digest = _credential_digest(x_api_key)
+        cached = _credential_cache.get(digest)
+        if cached is not None:
+            result = await db.execute(
+                select(User).where(User.id == cached[0], User.is_active == True)  # noqa: E712
+            )
+            user = result.scalar_one_or_none()
+            if user and user.api_key_prefix == cached[1]:
+                return user
+            _credential_cache.pop(digest)
+
+        # Check hashed keys in DB — indexed prefix lookup, normally one candidate
         result = await db.execute(
-            select(User).where(User.is_active == True)  # noqa: E712
+            select(User).where(
+                User.api_key_prefix == api_key_prefix(x_api_key),
+                User.is_active == True,  # noqa: E712
+            )
         )
-        users = result.scalars().all()
-        for user in users:
-            if user.api_key_hash and verify_api_key(x_api_key, user.api_key_hash):
+        for user in result.scalars().all():
+            if user.api_key_hash and await verify_api_key(x_api_key, user.api_key_hash):
+                _credential_cache.set(digest, (user.id, user.api_key_prefix))
                 return user
 
+        # Legacy keys issued before prefixes were stored — backfill on first match.
+        # Costs a bcrypt per legacy user; disable with LEGACY_API_KEYS once they are migrated.
+        if _may_be_legacy(x_api_key) and _legacy_misses.get(digest) is None:
+            result = await db.execute(
+                select(User).where(
+                    User.api_key_prefix.is_(None),
+                    User.api_key_hash.is_not(None),
+                    User.is_active == True,  # noqa: E712
+                )
+            )
+            for user in result.scalars().all():
+                if await verify_api_key(x_api_key, user.api_key_hash):
+                    user.api_key_prefix = api_key_prefix(x_api_key)
+                    await db.commit()
+                    _credential_cache.set(digest, (user.id, user.api_key_prefix))
+                    return user
+            _legacy_misses.set(digest, True)
+
     raise HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid or missing credentials",
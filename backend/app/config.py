@@ -11,10 +11,39 @@ class Settings:
     ADMIN_EMAIL: str = os.getenv("ADMIN_EMAIL", "admin@localhost.dev")
     ADMIN_PASSWORD: str = os.getenv("ADMIN_PASSWORD", "admin123")
     SYNC_ENABLED: bool = os.getenv("SYNC_ENABLED", "false").lower() == "true"
-    SYNC_INTERVAL: int = int(os.getenv("SYNC_INTERVAL", "86400"))  # default: 1 day
+    SYNC_INTERVAL: int = int(os.getenv("SYNC_INTERVAL", "86400"))  # default for new sources: 1 day
+    SYNC_MAX_CONCURRENT: int = int(os.getenv("SYNC_MAX_CONCURRENT", "3"))
+    SYNC_TIMEOUT: int = int(os.getenv("SYNC_TIMEOUT", "600"))
+    SYNC_POLL_INTERVAL: int = int(os.getenv("SYNC_POLL_INTERVAL", "30"))
+    LEASE_TTL: int = int(os.getenv("LEASE_TTL", "30"))
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     GIT_CLONE_TIMEOUT: int = int(os.getenv("GIT_CLONE_TIMEOUT", "60"))
     GIT_MAX_CONCURRENT: int = int(os.getenv("GIT_MAX_CONCURRENT", "5"))
+    GIT_MAX_PER_HOST: int = int(os.getenv("GIT_MAX_PER_HOST", "3"))
+    GIT_CACHE_DIR: str = os.getenv("GIT_CACHE_DIR", "./data/git-cache")
+    GIT_CACHE_MAX_MB: int = int(os.getenv("GIT_CACHE_MAX_MB", "2048"))
+    GIT_PARTIAL_CLONE: bool = os.getenv("GIT_PARTIAL_CLONE", "true").lower() == "true"
+    PACKAGE_CACHE_DIR: str = os.getenv("PACKAGE_CACHE_DIR", "./data/package-cache")
+    PACKAGE_CACHE_MAX_MB: int = int(os.getenv("PACKAGE_CACHE_MAX_MB", "512"))
+    PACKAGE_CACHE_MEMORY_MB: int = int(os.getenv("PACKAGE_CACHE_MEMORY_MB", "64"))
+    # How long installs reuse a fallback package when a skill's registered commit cannot be fetched
+    PACKAGE_ALIAS_TTL: int = int(os.getenv("PACKAGE_ALIAS_TTL", "300"))
+    # Leave one core for the event loop; 0 parses in a thread instead
+    IMPORT_WORKERS: int = int(os.getenv("IMPORT_WORKERS", str(min(4, (os.cpu_count() or 1) - 1))))
+    IMPORT_CHUNK_SIZE: int = int(os.getenv("IMPORT_CHUNK_SIZE", "50"))
+    IMPORT_MAX_JOBS: int = int(os.getenv("IMPORT_MAX_JOBS", "2"))
+    SEARCH_TIMEOUT: float = float(os.getenv("SEARCH_TIMEOUT", "2"))  # per asset type in /search
+    NGRAM_INDEX: bool = os.getenv("NGRAM_INDEX", "true").lower() == "true"
+    NGRAM_REFRESH_INTERVAL: int = int(os.getenv("NGRAM_REFRESH_INTERVAL", "60"))
+    COUNT_CACHE_SIZE: int = int(os.getenv("COUNT_CACHE_SIZE", "1024"))
+    COUNT_CACHE_TTL: int = int(os.getenv("COUNT_CACHE_TTL", "60"))  # max age of total=approx counts
+    # Accept API keys issued before key prefixes were stored (one bcrypt per such user
+    # on unknown keys); turn off once every user has used or regenerated their key
+    LEGACY_API_KEYS: bool = os.getenv("LEGACY_API_KEYS", "true").lower() == "true"
+    AUTH_CACHE_SIZE: int = int(os.getenv("AUTH_CACHE_SIZE", "1024"))
+    AUTH_CACHE_TTL: int = int(os.getenv("AUTH_CACHE_TTL", "300"))
+    TOKEN_EPOCH_TTL: float = float(os.getenv("TOKEN_EPOCH_TTL", "5"))  # max lag of JWT revocation across workers
+    HASH_MAX_WORKERS: int = int(os.getenv("HASH_MAX_WORKERS", "4"))
 
 
 settings = Settings()
@@ -1,5 +1,6 @@
 """Database engine and session setup — supports SQLite and PostgreSQL."""
 
+from sqlalchemy import inspect, text
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
@@ -23,6 +24,31 @@ class Base(DeclarativeBase):
     pass
 
 
+def upgrade_schema(conn) -> None:
+    """Add columns and indexes introduced after a table was first created.
+
+    ``create_all`` only creates missing tables, so dev databases would otherwise
+    miss new columns. Only nullable or server-defaulted columns are added.
+    """
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing_columns = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns:
+                continue
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=conn.dialect)}"
+            if column.server_default is not None:
+                default = column.server_default.arg
+                ddl += f" DEFAULT {default.text if hasattr(default, 'text') else repr(default)}"
+            conn.execute(text(ddl))
+        existing_indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(conn)
+
+
 async def get_db() -> AsyncSession:
     """FastAPI dependency — yields a database session."""
     async with async_session() as session:
@@ -3,30 +3,33 @@
 import asyncio
 import logging
 from contextlib import asynccontextmanager
-from datetime import datetime, timezone
 
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
-from sqlalchemy import select
+from sqlalchemy import func, select
 
 from .config import settings
-from .database import engine, Base, async_session
+from .database import engine, Base, async_session, upgrade_schema
 from .models import *  # noqa: F401,F403 — ensure all models are registered
 from .models.user import User
-from .models.sync_source import SyncSource
-from .auth import generate_api_key, hash_api_key, hash_password
-from .services import import_service
+from .auth import api_key_prefix, generate_api_key, hash_password, verify_api_key
+from .services import import_service, job_service, lease, ngram_index, search_index, sync_scheduler, tag_index
 from .routes import skills, mcps, agents, auth_routes, admin, search
 
 logging.basicConfig(level=getattr(logging, settings.LOG_LEVEL))
 logger = logging.getLogger(__name__)
 
+BACKGROUND_LEASE = "background"
+
 
 async def init_db():
     """Create tables (for SQLite dev mode). Production uses Alembic."""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(upgrade_schema)
+        await conn.run_sync(search_index.install)
+        await conn.run_sync(tag_index.backfill)
 
 
 async def init_admin():
@@ -36,61 +39,84 @@ async def init_admin():
 
     async with async_session() as db:
         result = await db.execute(select(User).where(User.username == settings.ADMIN_USERNAME))
-        if result.scalar_one_or_none():
+        admin = result.scalar_one_or_none()
+        if admin:
+            await _forget_env_admin_key(db, admin)
             return
 
+        # The env key is matched in plain text by get_current_user, so neither
+        # its hash nor its first characters are stored
         admin = User(
             username=settings.ADMIN_USERNAME,
             email=settings.ADMIN_EMAIL,
             role="admin",
-            password_hash=hash_password(settings.ADMIN_PASSWORD),
-            api_key_hash=hash_api_key(settings.ADMIN_API_KEY),
+            password_hash=await hash_password(settings.ADMIN_PASSWORD),
         )
         db.add(admin)
         await db.commit()
         logger.info(f"Admin user '{settings.ADMIN_USERNAME}' created.")
 
 
-async def sync_sources_loop():
-    """Background task: sync all active sync sources on SYNC_INTERVAL."""
-    while True:
-        await asyncio.sleep(settings.SYNC_INTERVAL)
-        logger.info("Background sync: starting...")
-        async with async_session() as db:
-            result = await db.execute(
-                select(SyncSource).where(SyncSource.is_active == True)  # noqa: E712
-            )
-            sources = result.scalars().all()
-            # Find admin user for author_id
-            admin_result = await db.execute(select(User).where(User.role == "admin"))
-            admin_user = admin_result.scalar_one_or_none()
-            if not admin_user:
-                logger.warning("Background sync: no admin user found, skipping.")
-                continue
-
-            for source in sources:
-                try:
-                    imported = await import_service.import_from_url(db, source.git_url, admin_id=admin_user.id)
-                    source.last_synced_at = datetime.now(timezone.utc)
-                    await db.commit()
-                    logger.info(f"Synced '{source.git_url}': {len(imported)} new assets.")
-                except Exception as e:
-                    logger.error(f"Sync failed for '{source.git_url}': {e}")
-        logger.info("Background sync: done.")
+async def _forget_env_admin_key(db, admin: User):
+    """Drop the env admin key from a row created by an older release, which stored its hash and prefix."""
+    if not admin.api_key_hash:
+        return
+    if admin.api_key_prefix is not None:
+        stored_env_key = admin.api_key_prefix == api_key_prefix(settings.ADMIN_API_KEY)
+    else:
+        stored_env_key = await verify_api_key(settings.ADMIN_API_KEY, admin.api_key_hash)
+    if stored_env_key:
+        admin.api_key_hash = None
+        admin.api_key_prefix = None
+        await db.commit()
+        logger.info(f"Removed the stored copy of ADMIN_API_KEY from user '{admin.username}'.")
+
+
+async def report_legacy_keys():
+    """Log how many users still depend on the legacy API key scan."""
+    if not settings.LEGACY_API_KEYS:
+        return
+    async with async_session() as db:
+        count = await db.scalar(
+            select(func.count(User.id)).where(User.api_key_prefix.is_(None), User.api_key_hash.is_not(None))
+        )
+    if count:
+        logger.warning(f"{count} users have API keys without a stored prefix; keep LEGACY_API_KEYS on until they are used or regenerated.")
+    else:
+        logger.info("No legacy API keys left; LEGACY_API_KEYS can be turned off.")
+
+
+async def leader_work():
+    """Singleton background work, run only by the process holding the lease."""
+    if settings.SYNC_ENABLED:
+        logger.info(f"Background sync enabled (max {settings.SYNC_MAX_CONCURRENT} concurrent sources).")
+        await asyncio.gather(job_service.run(), sync_scheduler.run())
+    else:
+        await job_service.run()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db()
     await init_admin()
-    sync_task = None
-    if settings.SYNC_ENABLED:
-        sync_task = asyncio.create_task(sync_sources_loop())
-        logger.info(f"Background sync enabled (interval: {settings.SYNC_INTERVAL}s).")
+    await report_legacy_keys()
+    # Every worker/replica competes for the lease; only the holder resumes jobs and syncs
+    leader_task = asyncio.create_task(lease.run_as_leader(BACKGROUND_LEASE, leader_work))
+    # Each process searches its own in-memory index, so every process maintains one
+    tasks = [leader_task]
+    if settings.NGRAM_INDEX:
+        tasks.append(asyncio.create_task(ngram_index.run()))
     logger.info("Skills Registry started.")
     yield
-    if sync_task:
-        sync_task.cancel()
+    for task in tasks:
+        task.cancel()
+    for task in tasks:
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    job_service.shutdown()
+    import_service.shutdown()
     logger.info("Skills Registry shutting down.")
 
 
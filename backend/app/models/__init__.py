@@ -6,5 +6,8 @@ from .agent_config import AgentConfig
 from .user import User
 from .install_log import InstallLog
 from .sync_source import SyncSource
+from .import_job import ImportJob
+from .lease import Lease
+from .asset_tag import AssetTag
 
-__all__ = ["Skill", "MCPServer", "AgentConfig", "User", "InstallLog", "SyncSource"]
+__all__ = ["Skill", "MCPServer", "AgentConfig", "User", "InstallLog", "SyncSource", "ImportJob", "Lease", "AssetTag"]
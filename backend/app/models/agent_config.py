@@ -2,7 +2,7 @@
 
 import json
 from datetime import datetime, timezone
-from sqlalchemy import DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from ..database import Base
@@ -35,6 +35,9 @@ class AgentConfig(Base):
 
     author = relationship("User", lazy="joined")
 
+    # Listing order, so keyset pagination is an index range scan
+    __table_args__ = (Index("ix_agent_configs_installs_id", "installs", "id"),)
+
     @property
     def tags(self) -> list[str]:
         return json.loads(self._tags) if self._tags else []
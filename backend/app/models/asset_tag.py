@@ -0,0 +1,19 @@
+"""AssetTag ORM model — one row per (asset, tag), shared by all asset types."""
+
+from sqlalchemy import Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..database import Base
+
+
+class AssetTag(Base):
+    __tablename__ = "asset_tags"
+
+    # Primary key order serves "which assets have tag X" lookups
+    asset_type: Mapped[str] = mapped_column(String(16), primary_key=True)  # skill | mcp | agent
+    tag: Mapped[str] = mapped_column(String(128), primary_key=True)
+    asset_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    __table_args__ = (
+        Index("ix_asset_tags_asset", "asset_type", "asset_id"),
+    )
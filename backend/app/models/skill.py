@@ -2,7 +2,7 @@
 
 import json
 from datetime import datetime, timezone
-from sqlalchemy import DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from ..database import Base
@@ -16,10 +16,12 @@ class Skill(Base):
     description: Mapped[str] = mapped_column(Text, nullable=False)
     version: Mapped[str | None] = mapped_column(String(32), nullable=True)
     _tags: Mapped[str] = mapped_column("tags", Text, default="[]", nullable=False)
-    git_url: Mapped[str] = mapped_column(Text, nullable=False)
+    git_url: Mapped[str] = mapped_column(Text, index=True, nullable=False)
     git_ref: Mapped[str | None] = mapped_column(String(128), nullable=True)
     commit_hash: Mapped[str] = mapped_column(String(40), nullable=False)
     skill_path: Mapped[str] = mapped_column(Text, nullable=False)
+    # Git tree id of the skill directory; changes iff any file in it changes
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
     readme_content: Mapped[str] = mapped_column(Text, nullable=False, default="")
     readme_html: Mapped[str] = mapped_column(Text, nullable=False, default="")
     source: Mapped[str] = mapped_column(String(16), nullable=False, default="internal")
@@ -37,6 +39,9 @@ class Skill(Base):
 
     author = relationship("User", lazy="joined")
 
+    # Listing order, so keyset pagination is an index range scan
+    __table_args__ = (Index("ix_skills_installs_id", "installs", "id"),)
+
     @property
     def tags(self) -> list[str]:
         return json.loads(self._tags) if self._tags else []
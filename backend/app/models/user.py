@@ -1,7 +1,7 @@
 """User ORM model."""
 
 from datetime import datetime, timezone
-from sqlalchemy import Boolean, DateTime, Integer, String
+from sqlalchemy import Boolean, DateTime, Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 from ..database import Base
@@ -17,7 +17,11 @@ class User(Base):
     role: Mapped[str] = mapped_column(String(16), nullable=False, default="user")
     password_hash: Mapped[str | None] = mapped_column(String(256), nullable=True)
     api_key_hash: Mapped[str | None] = mapped_column(String(256), index=True, nullable=True)
+    # Non-secret leading characters of the API key — narrows auth to one bcrypt check
+    api_key_prefix: Mapped[str | None] = mapped_column(String(16), index=True, nullable=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+    # Bumped on role change / disable — JWTs carrying an older epoch are rejected
+    token_epoch: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
     created_at: Mapped[datetime] = mapped_column(
         DateTime, default=lambda: datetime.now(timezone.utc), nullable=False
     )
@@ -27,3 +31,6 @@ class User(Base):
         onupdate=lambda: datetime.now(timezone.utc),
         nullable=False,
     )
+
+    # Admin listing order, so keyset pagination is an index range scan
+    __table_args__ = (Index("ix_users_created_at_id", "created_at", "id"),)
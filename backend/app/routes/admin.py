@@ -1,19 +1,21 @@
 """Admin API routes."""
 
-from datetime import datetime, timezone
-
 from fastapi import APIRouter, Depends, HTTPException, Query
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..auth import require_admin
+from ..auth import credential_cache_stats, hash_pool_stats, require_admin, token_epoch_stats
+from ..config import settings
 from ..database import get_db
 from ..models.user import User
-from ..services import user_service, import_service, skill_service, mcp_service, agent_service
+from ..services import (
+    user_service, skill_service, mcp_service, agent_service, git_service, job_service, lease, package_cache,
+    ngram_index, pagination, sync_scheduler,
+)
+from ..models.import_job import ImportJob
 from ..models.sync_source import SyncSource
 from skills_registry_shared.schemas.user import UserResponse
-from skills_registry_shared.schemas.skill import SkillResponse
 from skills_registry_shared.schemas.common import PaginatedResult
 
 router = APIRouter(prefix="/api/v1/admin", tags=["admin"])
@@ -25,6 +27,7 @@ class ImportRequest(BaseModel):
 
 class SyncSourceCreate(BaseModel):
     git_url: str
+    sync_interval: int | None = Field(None, ge=60)  # seconds; defaults to SYNC_INTERVAL
 
 
 class RoleUpdate(BaseModel):
@@ -37,10 +40,14 @@ class RoleUpdate(BaseModel):
 async def list_users(
     page: int = Query(1, ge=1),
     size: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None, description="next_cursor of the previous page; overrides page"),
+    total: str = Query(
+        "exact", pattern=r"^(exact|approx|none)$", description="approx may be cached; none reports only has_more"
+    ),
     user: User = Depends(require_admin),
     db: AsyncSession = Depends(get_db),
 ):
-    return await user_service.list_users(db, page=page, size=size)
+    return await user_service.list_users(db, page=page, size=size, cursor=cursor, total=total)
 
 
 @router.put("/users/{user_id}/role", response_model=UserResponse)
@@ -64,13 +71,43 @@ async def disable_user(
 
 # --- Import ---
 
-@router.post("/import", response_model=list[SkillResponse])
+@router.post("/import", status_code=202)
 async def import_skills(
     data: ImportRequest,
     user: User = Depends(require_admin),
     db: AsyncSession = Depends(get_db),
 ):
-    return await import_service.import_from_url(db, data.git_url, admin_id=user.id)
+    """Start an import job; poll GET /jobs/{id} for its progress."""
+    job = await job_service.enqueue(db, "import", data.git_url, created_by=user.id)
+    return job_service.to_dict(job)
+
+
+# --- Jobs ---
+
+@router.get("/jobs")
+async def list_jobs(
+    status: str | None = Query(None, pattern=r"^(queued|running|succeeded|failed)$"),
+    limit: int = Query(50, ge=1, le=200),
+    user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+):
+    query = select(ImportJob).order_by(ImportJob.id.desc()).limit(limit)
+    if status:
+        query = query.where(ImportJob.status == status)
+    result = await db.execute(query)
+    return [job_service.to_dict(j) for j in result.scalars().all()]
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(
+    job_id: int,
+    user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+):
+    job = await db.get(ImportJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_service.to_dict(job)
 
 
 # --- Asset Management ---
@@ -129,6 +166,12 @@ async def list_sync_sources(
             "git_url": s.git_url,
             "last_synced_at": s.last_synced_at.isoformat() if s.last_synced_at else None,
             "last_commit_hash": s.last_commit_hash,
+            "sync_interval": s.sync_interval,
+            "next_sync_at": s.next_sync_at.isoformat() if s.next_sync_at else None,
+            "last_status": s.last_status,
+            "last_error": s.last_error,
+            "last_duration": s.last_duration,
+            "consecutive_failures": s.consecutive_failures,
             "created_at": s.created_at.isoformat(),
         }
         for s in sources
@@ -141,11 +184,20 @@ async def add_sync_source(
     user: User = Depends(require_admin),
     db: AsyncSession = Depends(get_db),
 ):
-    source = SyncSource(git_url=data.git_url, created_by=user.id)
+    source = SyncSource(
+        git_url=data.git_url,
+        sync_interval=data.sync_interval or settings.SYNC_INTERVAL,
+        created_by=user.id,
+    )
     db.add(source)
     await db.commit()
     await db.refresh(source)
-    return {"id": source.id, "git_url": source.git_url, "created_at": source.created_at.isoformat()}
+    return {
+        "id": source.id,
+        "git_url": source.git_url,
+        "sync_interval": source.sync_interval,
+        "created_at": source.created_at.isoformat(),
+    }
 
 
 @router.delete("/sync-sources/{source_id}", status_code=204)
@@ -162,18 +214,51 @@ async def delete_sync_source(
     await db.commit()
 
 
-@router.post("/sync-sources/{source_id}/sync")
+@router.post("/sync-sources/{source_id}/sync", status_code=202)
 async def trigger_sync(
     source_id: int,
+    force: bool = Query(False),
     user: User = Depends(require_admin),
     db: AsyncSession = Depends(get_db),
 ):
+    """Start a sync job for the source; poll GET /jobs/{id} for its progress."""
     result = await db.execute(select(SyncSource).where(SyncSource.id == source_id, SyncSource.is_active == True))
     source = result.scalar_one_or_none()
     if not source:
         raise HTTPException(status_code=404, detail="Sync source not found")
 
-    imported = await import_service.import_from_url(db, source.git_url, admin_id=user.id)
-    source.last_synced_at = datetime.now(timezone.utc)
-    await db.commit()
-    return {"synced": len(imported), "git_url": source.git_url}
+    job = await job_service.enqueue(
+        db, "sync", source.git_url, created_by=user.id, source_id=source.id, force=force
+    )
+    return job_service.to_dict(job)
+
+
+# --- Leases ---
+
+@router.get("/leases")
+async def list_leases(
+    user: User = Depends(require_admin),
+    db: AsyncSession = Depends(get_db),
+):
+    """Which process holds each background-work lease, and until when."""
+    return {"this_process": lease.OWNER, "leases": await lease.state(db)}
+
+
+# --- Metrics ---
+
+@router.get("/metrics")
+async def get_metrics(user: User = Depends(require_admin)):
+    """In-process cache and worker counters, for sizing."""
+    return {
+        "auth_cache": credential_cache_stats(),
+        "token_epochs": token_epoch_stats(),
+        "hash_pool": hash_pool_stats(),
+        "package_cache": package_cache.stats(),
+        "install_singleflight": skill_service.install_flights.stats(),
+        "package_aliases": skill_service.package_aliases.stats(),
+        "count_cache": pagination.count_cache_stats(),
+        "ngram_index": ngram_index.stats(),
+        "git_scheduler": git_service.scheduler.stats(),
+        "sync_scheduler": sync_scheduler.stats(),
+        "import_jobs": job_service.stats(),
+    }
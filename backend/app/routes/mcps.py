@@ -6,7 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from ..auth import get_current_user, require_admin
 from ..database import get_db
 from ..models.user import User
-from ..services import mcp_service
+from ..services import mcp_service, tag_index
 from skills_registry_shared.schemas.mcp import MCPServerCreate, MCPServerResponse, MCPInstallConfig
 from skills_registry_shared.schemas.common import PaginatedResult
 
@@ -16,12 +16,20 @@ router = APIRouter(prefix="/api/v1/mcps", tags=["mcps"])
 @router.get("", response_model=PaginatedResult[MCPServerResponse])
 async def list_mcps(
     keyword: str | None = None,
-    tag: str | None = None,
+    tag: list[str] | None = Query(None, description="Repeat or comma-separate for several tags"),
+    tag_match: str = Query("all", pattern=r"^(all|any)$"),
     page: int = Query(1, ge=1),
     size: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None, description="next_cursor of the previous page; overrides page"),
+    total: str = Query(
+        "exact", pattern=r"^(exact|approx|none)$", description="approx may be cached; none reports only has_more"
+    ),
     db: AsyncSession = Depends(get_db),
 ):
-    return await mcp_service.search(db, keyword=keyword, tag=tag, page=page, size=size)
+    return await mcp_service.search(
+        db, keyword=keyword, tags=tag_index.parse_tags(tag), tag_match=tag_match,
+        page=page, size=size, cursor=cursor, total=total,
+    )
 
 
 @router.get("/top", response_model=list[MCPServerResponse])
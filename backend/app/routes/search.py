@@ -1,31 +1,110 @@
 """Unified search API."""
 
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+import logging
 
-from ..database import get_db
-from ..services import skill_service, mcp_service, agent_service
+from fastapi import APIRouter, Query
+from sqlalchemy import func, select
+
+from ..config import settings
+from ..database import async_session
+from ..services import skill_service, mcp_service, agent_service, ngram_index, tag_index
+from skills_registry_shared.schemas.common import PaginatedResult, SearchSuggestion
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1/search", tags=["search"])
 
+_SERVICES = {"skill": ("skills", skill_service), "mcp": ("mcps", mcp_service), "agent": ("agents", agent_service)}
+
+
+async def _search_type(service, **params) -> PaginatedResult:
+    # Own session per type, so the searches can run at the same time
+    async with async_session() as db:
+        return await service.search(db, **params)
+
 
 @router.get("")
 async def search(
     q: str | None = None,
     type: str | None = Query(None, pattern=r"^(skill|mcp|agent)$"),
-    tag: str | None = None,
+    tag: list[str] | None = Query(None, description="Repeat or comma-separate for several tags"),
+    tag_match: str = Query("all", pattern=r"^(all|any)$"),
     page: int = Query(1, ge=1),
     size: int = Query(20, ge=1, le=100),
-    db: AsyncSession = Depends(get_db),
+    cursor: str | None = Query(None, description="next_cursor of one type's results; requires type"),
+    total: str = Query(
+        "exact", pattern=r"^(exact|approx|none)$", description="approx may be cached; none reports only has_more"
+    ),
 ):
-    """Cross-asset type search. Returns combined results."""
-    results = {}
+    """Cross-asset type search. Returns combined results.
+
+    Keywords are matched fuzzily through the n-gram index, so typos and CJK
+    text without word breaks still find results. Asset types are searched
+    concurrently; a type that does not answer within SEARCH_TIMEOUT comes back
+    empty and is listed in ``timed_out``.
 
-    if type is None or type == "skill":
-        results["skills"] = await skill_service.search(db, keyword=q, tag=tag, page=page, size=size)
-    if type is None or type == "mcp":
-        results["mcps"] = await mcp_service.search(db, keyword=q, tag=tag, page=page, size=size)
-    if type is None or type == "agent":
-        results["agents"] = await agent_service.search(db, keyword=q, tag=tag, page=page, size=size)
+    Each type's ``next_cursor`` continues that type only: pass it back as
+    ``cursor`` together with the same ``type``.
+    """
+    if cursor is not None and not type:
+        from fastapi import HTTPException
+        raise HTTPException(status_code=400, detail="cursor requires type.")
+    params = {
+        "keyword": q, "tags": tag_index.parse_tags(tag), "tag_match": tag_match,
+        "page": page, "size": size, "cursor": cursor, "total": total, "fuzzy": True,
+    }
+    selected = [_SERVICES[type]] if type else list(_SERVICES.values())
+    outcomes = await asyncio.gather(
+        *(asyncio.wait_for(_search_type(service, **params), settings.SEARCH_TIMEOUT) for _, service in selected),
+        return_exceptions=True,
+    )
 
+    results: dict = {"timed_out": []}
+    for (key, _), outcome in zip(selected, outcomes):
+        if isinstance(outcome, asyncio.TimeoutError):
+            logger.warning(f"Search of {key} for '{q}' timed out after {settings.SEARCH_TIMEOUT}s.")
+            results["timed_out"].append(key)
+            empty = None if total == "none" else 0
+            outcome = PaginatedResult(items=[], total=empty, page=page, size=size, pages=empty)
+        elif isinstance(outcome, BaseException):
+            raise outcome
+        results[key] = outcome
     return results
+
+
+async def _suggest_from_db(q: str, limit: int, type: str | None) -> list[tuple[str, int, str]]:
+    """Names starting with ``q``, most installed first; used while the in-memory index is unavailable."""
+    pattern = q.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    found = []
+    async with async_session() as db:
+        for model, asset_type in ngram_index.ASSET_TYPES.items():
+            if type and asset_type != type:
+                continue
+            result = await db.execute(
+                select(model.installs, model.id, model.name)
+                .where(func.lower(model.name).like(pattern, escape="\\"))
+                .order_by(model.installs.desc())
+                .limit(limit)
+            )
+            found.extend((installs, asset_type, asset_id, name) for installs, asset_id, name in result)
+    found.sort(key=lambda row: row[0], reverse=True)
+    return [row[1:] for row in found[:limit]]
+
+
+@router.get("/suggest", response_model=list[SearchSuggestion])
+async def suggest(
+    q: str = Query(..., min_length=1, max_length=64),
+    type: str | None = Query(None, pattern=r"^(skill|mcp|agent)$"),
+    limit: int = Query(10, ge=1, le=20),
+):
+    """Search-as-you-type completions of asset names.
+
+    Names starting with ``q`` come first, then names with a later word
+    starting with it (``postgres`` finds ``mcp-postgres``); more installs
+    rank higher. Served from memory, so it is cheap enough for every keystroke.
+    """
+    found = ngram_index.suggest(q, limit, type)
+    if found is None:
+        found = await _suggest_from_db(q, limit, type)
+    return [SearchSuggestion(id=asset_id, name=name, type=asset_type) for asset_type, asset_id, name in found]
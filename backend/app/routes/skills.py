@@ -1,12 +1,13 @@
 """Skills API routes."""
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..auth import get_current_user, require_admin
 from ..database import get_db
 from ..models.user import User
-from ..services import skill_service
+from ..services import skill_service, tag_index
 from skills_registry_shared.schemas.skill import SkillCreate, SkillResponse, SkillInstallPackage
 from skills_registry_shared.schemas.common import PaginatedResult
 
@@ -16,12 +17,20 @@ router = APIRouter(prefix="/api/v1/skills", tags=["skills"])
 @router.get("", response_model=PaginatedResult[SkillResponse])
 async def list_skills(
     keyword: str | None = None,
-    tag: str | None = None,
+    tag: list[str] | None = Query(None, description="Repeat or comma-separate for several tags"),
+    tag_match: str = Query("all", pattern=r"^(all|any)$"),
     page: int = Query(1, ge=1),
     size: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None, description="next_cursor of the previous page; overrides page"),
+    total: str = Query(
+        "exact", pattern=r"^(exact|approx|none)$", description="approx may be cached; none reports only has_more"
+    ),
     db: AsyncSession = Depends(get_db),
 ):
-    return await skill_service.search(db, keyword=keyword, tag=tag, page=page, size=size)
+    return await skill_service.search(
+        db, keyword=keyword, tags=tag_index.parse_tags(tag), tag_match=tag_match,
+        page=page, size=size, cursor=cursor, total=total,
+    )
 
 
 @router.get("/top", response_model=list[SkillResponse])
@@ -67,6 +76,21 @@ async def get_install_package(
     return await skill_service.get_install_package(db, skill_id)
 
 
+@router.get("/{skill_id}/archive")
+async def get_install_archive(
+    skill_id: int,
+    request: Request,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Stream the skill package as .tar.gz — includes binary files, bounded memory."""
+    name, path, digest = await skill_service.get_install_archive(db, skill_id)
+    etag = f'"{digest}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return FileResponse(path, media_type="application/gzip", filename=f"{name}.tar.gz", headers={"ETag": etag})
+
+
 @router.post("/{skill_id}/install", status_code=204)
 async def record_install(
     skill_id: int,
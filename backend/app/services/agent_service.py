@@ -12,6 +12,7 @@ from skills_registry_shared.schemas.agent import (
 )
 from skills_registry_shared.schemas.user import UserBrief
 from skills_registry_shared.schemas.common import PaginatedResult
+from . import ngram_index, pagination, search_index, tag_index
 
 
 def _to_response(a: AgentConfig) -> AgentConfigResponse:
@@ -63,33 +64,37 @@ async def get_by_id(db: AsyncSession, agent_id: int) -> AgentConfigResponse | No
 async def search(
     db: AsyncSession,
     keyword: str | None = None,
-    tag: str | None = None,
+    tags: list[str] | None = None,
+    tag_match: str = "all",
     page: int = 1,
     size: int = 20,
+    cursor: str | None = None,
+    total: str = "exact",
+    fuzzy: bool = False,
 ) -> PaginatedResult[AgentConfigResponse]:
     query = select(AgentConfig)
     count_query = select(func.count(AgentConfig.id))
 
+    filt = tag_index.filter_clause(AgentConfig, tags, tag_match) if tags else None
+    if keyword and fuzzy:
+        ids = ngram_index.search("agent", keyword)
+        if ids is not None:
+            return await pagination.fetch_ranked(
+                db, AgentConfig, ids, _to_response, where=filt, page=page, size=size, cursor=cursor, total=total
+            )
+
+    rank = None
     if keyword:
-        kw = f"%{keyword.lower()}%"
-        filt = func.lower(AgentConfig.name).like(kw) | func.lower(AgentConfig.description).like(kw)
+        query, rank = search_index.apply(query, AgentConfig, keyword)
+        count_query, _ = search_index.apply(count_query, AgentConfig, keyword)
+    if filt is not None:
         query = query.where(filt)
         count_query = count_query.where(filt)
 
-    total_result = await db.execute(count_query)
-    total = total_result.scalar() or 0
-
-    query = query.order_by(AgentConfig.installs.desc()).offset((page - 1) * size).limit(size)
-    result = await db.execute(query)
-    agents = result.scalars().all()
-
-    if tag:
-        agents = [a for a in agents if tag in a.tags]
-        total = len(agents)
-
-    items = [_to_response(a) for a in agents]
-    pages = (total + size - 1) // size if total > 0 else 0
-    return PaginatedResult(items=items, total=total, page=page, size=size, pages=pages)
+    return await pagination.fetch_page(
+        db, query, count_query, [AgentConfig.installs, AgentConfig.id], _to_response,
+        rank=rank, page=page, size=size, cursor=cursor, total=total,
+    )
 
 
 async def list_top(db: AsyncSession, limit: int = 10) -> list[AgentConfigResponse]:
@@ -0,0 +1,124 @@
+"""Priority-aware admission control for git network jobs.
+
+Jobs wait for a slot under a global cap (GIT_MAX_CONCURRENT) and a per-host
+cap (GIT_MAX_PER_HOST). Waiting jobs are served by priority, then FIFO, so
+interactive installs overtake queued background syncs, and a slow host only
+holds back jobs for that host.
+"""
+
+import asyncio
+import bisect
+import itertools
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import AsyncIterator
+from urllib.parse import urlsplit
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0  # user-facing installs
+    ADMIN = 1  # admin-triggered imports and syncs
+    BACKGROUND = 2  # scheduled source syncs
+
+
+_WAIT_BUCKETS = [0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60]
+
+
+def host_of(url: str) -> str:
+    """Return the host of an http(s)/ssh/scp-style git URL, or "local" for paths."""
+    if "://" in url:
+        return urlsplit(url).hostname or "local"
+    if ":" in url.split("/", 1)[0]:
+        return url.split(":", 1)[0].rsplit("@", 1)[-1]  # git@host:org/repo
+    return "local"
+
+
+class _Histogram:
+    """Cumulative-bucket histogram, Prometheus-style."""
+
+    def __init__(self, buckets: list[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+
+    def snapshot(self) -> dict:
+        cumulative = list(itertools.accumulate(self.counts))
+        return {
+            "buckets": {str(b): c for b, c in zip(self.buckets + ["+Inf"], cumulative)},
+            "count": cumulative[-1],
+            "sum": round(self.total, 3),
+        }
+
+
+class GitScheduler:
+    def __init__(self, max_concurrent: int, max_per_host: int):
+        self.max_concurrent = max_concurrent
+        self.max_per_host = max_per_host
+        self._seq = itertools.count()
+        # Sorted by (priority, seq); seq is unique so futures are never compared
+        self._waiting: list[tuple[int, int, str, asyncio.Future]] = []
+        self._running = 0
+        self._running_by_host: Counter[str] = Counter()
+        self._wait_times = {p: _Histogram(_WAIT_BUCKETS) for p in Priority}
+
+    def _dispatch(self) -> None:
+        """Grant slots to the highest-priority waiters whose host has capacity."""
+        i = 0
+        while i < len(self._waiting) and self._running < self.max_concurrent:
+            _, _, host, fut = self._waiting[i]
+            if fut.done():  # waiter was cancelled; its own handler is about to run
+                del self._waiting[i]
+                continue
+            if self._running_by_host[host] >= self.max_per_host:
+                i += 1
+                continue
+            del self._waiting[i]
+            self._running += 1
+            self._running_by_host[host] += 1
+            fut.set_result(None)
+
+    def _release(self, host: str) -> None:
+        self._running -= 1
+        self._running_by_host[host] -= 1
+        if not self._running_by_host[host]:
+            del self._running_by_host[host]
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, url: str, priority: Priority) -> AsyncIterator[None]:
+        """Hold a git job slot for ``url`` for the duration of the block."""
+        host = host_of(url)
+        entry = (priority, next(self._seq), host, asyncio.get_running_loop().create_future())
+        bisect.insort(self._waiting, entry)
+        started = time.monotonic()
+        self._dispatch()
+        try:
+            await entry[3]
+        except asyncio.CancelledError:
+            if entry[3].done() and not entry[3].cancelled():
+                self._release(host)  # granted, but cancelled before it could run
+            elif entry in self._waiting:
+                self._waiting.remove(entry)
+            raise
+        self._wait_times[priority].observe(time.monotonic() - started)
+        try:
+            yield
+        finally:
+            self._release(host)
+
+    def stats(self) -> dict:
+        queued = Counter(Priority(p).name.lower() for p, *_ in self._waiting)
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_per_host": self.max_per_host,
+            "running": self._running,
+            "running_by_host": dict(self._running_by_host),
+            "queued": {p.name.lower(): queued[p.name.lower()] for p in Priority},
+            "wait_seconds": {p.name.lower(): h.snapshot() for p, h in self._wait_times.items()},
+        }
@@ -1,47 +1,277 @@
-"""Git operations — shallow clone, skill discovery, cleanup."""
+"""Git operations — mirror cache, checkout, skill discovery, cleanup."""
 
 import asyncio
+import fcntl
+import hashlib
+import logging
+import os
+import re
 import shutil
 import tempfile
+import time
+import uuid
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from ..config import settings
+from .git_scheduler import GitScheduler, Priority
 
-_semaphore = asyncio.Semaphore(settings.GIT_MAX_CONCURRENT)
+logger = logging.getLogger(__name__)
+
+scheduler = GitScheduler(settings.GIT_MAX_CONCURRENT, settings.GIT_MAX_PER_HOST)
+
+# The remote's HEAD is stored separately so checkouts without an explicit ref
+# get the remote's default branch; other refs are fetched only when requested.
+_REMOTE_HEAD = "refs/remote-head"
+# SKILL.md locations searched on import (same patterns as skills.sh)
+SKILL_MD_PATTERNS = [
+    "SKILL.md",
+    "skills/**/SKILL.md",
+    ".kiro/skills/**/SKILL.md",
+    ".claude/skills/**/SKILL.md",
+    ".agents/skills/**/SKILL.md",
+]
+# Discovery walk limits — vendored trees and runaway repos must not stall imports.
+# Only dependency directories are pruned; "build", "dist" or "vendor" may be skill names.
+_IGNORED_DIRS = {"node_modules", "__pycache__", "venv", "site-packages"}
+_DISCOVERY_MAX_DEPTH = 12
+_DISCOVERY_MAX_ENTRIES = 200_000
+_EVICT_INTERVAL = 60  # seconds between disk-budget checks
+_LOCK_POLL = 0.05  # seconds between attempts to take a mirror's file lock
+
+# GIT_CACHE_DIR is shared by every worker and replica, so mirrors are guarded
+# by file locks: "<mirror>.lock" exclusively while fetching or adding a
+# worktree, "<mirror>.use" shared for as long as a checkout uses its objects.
+_checkouts: dict[Path, tuple[Path, int]] = {}  # live worktree -> (mirror, fd holding its use lock)
+_last_evict = 0.0
 
 
 class GitError(Exception):
     pass
 
 
-async def clone_shallow(url: str, ref: str | None = None) -> Path:
-    """Shallow-clone a git repo to a temp directory."""
-    async with _semaphore:
-        tmp = Path(tempfile.mkdtemp(prefix="skills-"))
-        cmd = ["git", "clone", "--depth", "1"]
-        if ref:
-            cmd += ["--branch", ref]
-        cmd += [url, str(tmp)]
+async def _run_git(*args: str, cwd: Path | None = None) -> str:
+    """Run a git command and return stdout, raising GitError on failure or timeout."""
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            "git", *args,
+            cwd=str(cwd) if cwd else None,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except FileNotFoundError:
+        raise GitError("git is not installed or not in PATH")
+    try:
+        stdout, stderr = await asyncio.wait_for(
+            proc.communicate(), timeout=settings.GIT_CLONE_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        proc.kill()
+        raise GitError(f"git {args[0]} timed out after {settings.GIT_CLONE_TIMEOUT}s")
+    if proc.returncode != 0:
+        raise GitError(f"git {args[0]} failed: {stderr.decode().strip()}")
+    return stdout.decode().strip()
+
+
+def _mirror_dir(url: str) -> Path:
+    digest = hashlib.sha256(url.encode()).hexdigest()[:24]
+    return Path(settings.GIT_CACHE_DIR) / f"{digest}.git"
+
+
+def _lock_file(mirror: Path, kind: str) -> Path:
+    return mirror.with_name(f"{mirror.name}.{kind}")
+
+
+def _try_lock(path: Path, mode: int) -> int | None:
+    """Open ``path`` and take a non-blocking flock on it; the lock lives until the fd is closed."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, mode | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return None
+    return fd
+
+
+async def _lock(path: Path, mode: int) -> int:
+    # Polled rather than blocking in a thread, so cancellation never leaks a lock
+    while (fd := _try_lock(path, mode)) is None:
+        await asyncio.sleep(_LOCK_POLL)
+    return fd
+
 
+@asynccontextmanager
+async def _locked(path: Path, mode: int):
+    fd = await _lock(path, mode)
+    try:
+        yield
+    finally:
+        os.close(fd)
+
+
+def _local_ref(ref: str) -> str:
+    """Mirror ref a requested branch, tag or commit is fetched into."""
+    return f"refs/requested/{hashlib.sha256(ref.encode()).hexdigest()[:16]}"
+
+
+async def _init_mirror(url: str, mirror: Path, partial: bool) -> None:
+    """Create an empty bare mirror whose worktrees can use sparse checkout."""
+    mirror.mkdir(parents=True, exist_ok=True)
+    await _run_git("init", "--quiet", "--bare", str(mirror))
+    # core.bare must be per-worktree, or sparse-checkout refuses to run in worktrees
+    await _run_git("config", "extensions.worktreeConfig", "true", cwd=mirror)
+    await _run_git("config", "--unset", "core.bare", cwd=mirror)
+    await _run_git("config", "--worktree", "core.bare", "true", cwd=mirror)
+    # Worktrees share this object store — never prune it underneath them
+    await _run_git("config", "gc.auto", "0", cwd=mirror)
+    await _run_git("config", "remote.origin.url", url, cwd=mirror)
+    if partial:
+        # Blobless: commits and trees only; blobs are fetched lazily on checkout
+        await _run_git("config", "remote.origin.promisor", "true", cwd=mirror)
+        await _run_git("config", "remote.origin.partialclonefilter", "blob:none", cwd=mirror)
+
+
+async def _create_mirror(url: str, mirror: Path, refspec: str) -> None:
+    """Build a new mirror aside and move it into place once its first fetch succeeded,
+    so a mirror that exists is never half-initialised."""
+    staging = mirror.with_name(f"{mirror.name}.new-{uuid.uuid4().hex[:8]}")
+    partial = settings.GIT_PARTIAL_CLONE
+    try:
+        await _init_mirror(url, staging, partial)
+        await _run_git("fetch", "--quiet", "--no-tags", "--depth", "1", "origin", refspec, cwd=staging)
+    except GitError:
+        shutil.rmtree(staging, ignore_errors=True)
+        if not partial:
+            raise
+        # Server rejected the partial clone — fall back to a full mirror
         try:
-            proc = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-            )
-            _, stderr = await asyncio.wait_for(
-                proc.communicate(), timeout=settings.GIT_CLONE_TIMEOUT
-            )
-            if proc.returncode != 0:
-                raise GitError(f"git clone failed: {stderr.decode().strip()}")
-        except asyncio.TimeoutError:
+            await _init_mirror(url, staging, partial=False)
+            await _run_git("fetch", "--quiet", "--no-tags", "--depth", "1", "origin", refspec, cwd=staging)
+        except GitError:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+    shutil.rmtree(mirror, ignore_errors=True)  # leftovers of an interrupted older version
+    staging.rename(mirror)
+
+
+async def _fetch_mirror(url: str, mirror: Path, ref: str | None) -> str:
+    """Create or incrementally update the bare mirror for ``url`` with just ``ref``
+    (the remote's HEAD when None) and return the mirror ref to check out.
+    Caller holds the mirror's lock.
+    """
+    refspec = f"+{ref}:{_local_ref(ref)}" if ref else f"+HEAD:{_REMOTE_HEAD}"
+    if (mirror / "HEAD").exists():
+        # A failed update keeps the mirror: other checkouts may be using its objects
+        await _run_git("fetch", "--quiet", "--no-tags", "--depth", "1", "origin", refspec, cwd=mirror)
+    else:
+        await _create_mirror(url, mirror, refspec)
+    if not ref:
+        await _run_git("update-ref", "--no-deref", "HEAD", _REMOTE_HEAD, cwd=mirror)
+    await _run_git("worktree", "prune", cwd=mirror)
+    os.utime(mirror)  # mtime drives LRU eviction
+    return _local_ref(ref) if ref else "HEAD"
+
+
+def _literal_pattern(path: str) -> str:
+    """Escape a repo path for use as a gitignore-style sparse-checkout pattern."""
+    return re.sub(r"([*?\[\]\\!#])", r"\\\1", path.strip("/"))
+
+
+def sparse_dir(path: str) -> list[str] | None:
+    """Sparse patterns selecting one directory, or None for the repo root."""
+    path = path.strip("/")
+    if path in ("", "."):
+        return None
+    return [f"/{_literal_pattern(path)}/"]
+
+
+async def clone_shallow(
+    url: str,
+    ref: str | None = None,
+    sparse: list[str] | None = None,
+    priority: Priority = Priority.INTERACTIVE,
+) -> Path:
+    """Check out a git repo to a temp worktree of its cached mirror.
+
+    ``sparse`` limits the checkout (and the blobs fetched) to the given
+    gitignore-style patterns, e.g. ``["/skills/foo/"]``. ``ref`` may be a
+    branch, tag or commit; only that ref is fetched.
+    """
+    async with scheduler.slot(url, priority):
+        mirror = _mirror_dir(url)
+        # Taken first and held until cleanup(), so the mirror is never evicted under the checkout
+        use = await _lock(_lock_file(mirror, "use"), fcntl.LOCK_SH)
+        tmp = Path(tempfile.mkdtemp(prefix="skills-"))
+        _checkouts[tmp] = (mirror, use)
+        try:
+            async with _locked(_lock_file(mirror, "lock"), fcntl.LOCK_EX):
+                target = await _fetch_mirror(url, mirror, ref)
+                await _run_git(
+                    "worktree", "add", "--quiet", "--detach", "--no-checkout", str(tmp), target, cwd=mirror,
+                )
+        except BaseException:
             cleanup(tmp)
-            raise GitError(f"git clone timed out after {settings.GIT_CLONE_TIMEOUT}s")
-        except FileNotFoundError:
+            raise
+
+        try:
+            if sparse:
+                await _run_git("sparse-checkout", "set", "--no-cone", *sparse, cwd=tmp)
+            await _run_git("checkout", "--quiet", cwd=tmp)
+        except GitError:
             cleanup(tmp)
-            raise GitError("git is not installed or not in PATH")
+            raise
+
+    await _evict_mirrors()
+    return tmp
+
+
+def _mirror_usage(root: Path) -> list[tuple[float, int, Path]]:
+    """Return (mtime, bytes, path) for every mirror under ``root``."""
+    usage = []
+    for mirror in root.glob("*.git"):
+        size = sum(f.stat().st_size for f in mirror.rglob("*") if f.is_file())
+        usage.append((mirror.stat().st_mtime, size, mirror))
+    return usage
+
+
+async def _evict_mirrors() -> None:
+    """Delete least-recently-used mirrors until the cache fits GIT_CACHE_MAX_MB."""
+    global _last_evict
+    if time.monotonic() - _last_evict < _EVICT_INTERVAL:
+        return
+    _last_evict = time.monotonic()
+
+    usage = await asyncio.to_thread(_mirror_usage, Path(settings.GIT_CACHE_DIR))
+    total = sum(size for _, size, _ in usage)
+    budget = settings.GIT_CACHE_MAX_MB * 1024 * 1024
+
+    for _, size, mirror in sorted(usage):
+        if total <= budget:
+            break
+        # Skip mirrors being fetched or used by a checkout in any process
+        fds = [_try_lock(_lock_file(mirror, kind), fcntl.LOCK_EX) for kind in ("use", "lock")]
+        try:
+            if None in fds or not mirror.exists():
+                continue
+            # Rename first so the next fetch recreates a fresh mirror instead of racing rmtree
+            trash = mirror.with_name(f"{mirror.name}.evicted-{uuid.uuid4().hex[:8]}")
+            mirror.rename(trash)
+        finally:
+            for fd in fds:
+                if fd is not None:
+                    os.close(fd)
+        total -= size
+        await asyncio.to_thread(shutil.rmtree, trash, True)
+
 
-        return tmp
+async def remote_head(url: str, priority: Priority = Priority.INTERACTIVE) -> str:
+    """Return the commit the remote's HEAD points to, without fetching anything."""
+    async with scheduler.slot(url, priority):
+        out = await _run_git("ls-remote", url, "HEAD")
+    if not out:
+        raise GitError(f"git ls-remote returned no HEAD for {url}")
+    return out.split()[0]
 
 
 async def get_commit_hash(repo_dir: Path) -> str:
@@ -55,28 +285,79 @@ async def get_commit_hash(repo_dir: Path) -> str:
     return stdout.decode().strip()
 
 
+async def tree_hashes(repo_dir: Path, paths: list[str]) -> dict[str, str]:
+    """Return the git tree id of each directory at HEAD, keyed by path.
+
+    A tree id hashes everything below it, and trees are in the mirror even
+    when blobs are not, so files left out of a sparse checkout still count.
+    """
+    hashes = {}
+    if any(p in ("", ".") for p in paths):
+        hashes["."] = await _run_git("rev-parse", "HEAD^{tree}", cwd=repo_dir)
+    subdirs = [p for p in paths if p not in ("", ".")]
+    for i in range(0, len(subdirs), 500):
+        out = await _run_git("ls-tree", "-z", "HEAD", "--", *subdirs[i:i + 500], cwd=repo_dir)
+        for entry in filter(None, out.split("\0")):
+            info, path = entry.split("\t", 1)
+            hashes[path] = info.split()[2]
+    return hashes
+
+
+def _walk_skill_md(repo_dir: Path) -> list[Path]:
+    """Single pruned walk matching every SKILL_MD_PATTERNS entry at once."""
+    # "skills/**/SKILL.md" -> ("skills",); a bare "SKILL.md" only matches at the root
+    roots = {tuple(p.split("/**/")[0].split("/")) for p in SKILL_MD_PATTERNS if "/**/" in p}
+    match_root = "SKILL.md" in SKILL_MD_PATTERNS
+
+    found: list[Path] = []
+    seen: set[str] = set()
+    entries = 0
+    for dirpath, dirnames, filenames in os.walk(repo_dir):
+        rel = Path(dirpath).relative_to(repo_dir).parts
+        inside = any(rel[:len(r)] == r for r in roots)
+
+        if "SKILL.md" in filenames and (inside or (match_root and not rel)):
+            skill_md = Path(dirpath) / "SKILL.md"
+            real = os.path.realpath(skill_md)
+            if real not in seen:
+                seen.add(real)
+                found.append(skill_md)
+
+        entries += len(dirnames) + len(filenames)
+        if entries > _DISCOVERY_MAX_ENTRIES:
+            logger.warning(f"Skill discovery stopped after {entries} entries in {repo_dir}")
+            break
+
+        if inside:
+            # Same as glob: "**" skips hidden directories; also skip installed
+            # dependency trees, unless the directory itself is a skill
+            keep = len(rel) < _DISCOVERY_MAX_DEPTH
+            dirnames[:] = [
+                d for d in dirnames
+                if keep and not d.startswith(".")
+                and (d not in _IGNORED_DIRS or os.path.isfile(os.path.join(dirpath, d, "SKILL.md")))
+            ]
+        else:
+            # Above the pattern roots — only descend towards one of them
+            dirnames[:] = [d for d in dirnames if any(r[:len(rel) + 1] == rel + (d,) for r in roots)]
+        dirnames.sort()
+
+    return found
+
+
 async def discover_skills(repo_dir: Path) -> list[dict]:
     """Find all SKILL.md files in a repo (same patterns as skills.sh)."""
-    import glob
-
-    patterns = [
-        "SKILL.md",
-        "skills/**/SKILL.md",
-        ".kiro/skills/**/SKILL.md",
-        ".claude/skills/**/SKILL.md",
-        ".agents/skills/**/SKILL.md",
+    matches = await asyncio.to_thread(_walk_skill_md, repo_dir)
+    return [
+        {"path": str(p.parent.relative_to(repo_dir)), "skill_md": str(p)}
+        for p in matches
     ]
-    found = []
-    for pattern in patterns:
-        for match in glob.glob(str(repo_dir / pattern), recursive=True):
-            p = Path(match)
-            rel = p.parent.relative_to(repo_dir)
-            found.append({"path": str(rel), "skill_md": str(p)})
-
-    return found
 
 
 def cleanup(repo_dir: Path) -> None:
-    """Remove a temporary repo directory."""
+    """Remove a temporary worktree; its mirror metadata is pruned on the next fetch."""
     if repo_dir.exists():
         shutil.rmtree(repo_dir, ignore_errors=True)
+    checkout = _checkouts.pop(repo_dir, None)
+    if checkout is not None:
+        os.close(checkout[1])
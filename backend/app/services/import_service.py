@@ -1,66 +1,343 @@
 """External source import service."""
 
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable
+
 import markdown
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..config import settings
 from ..models.skill import Skill
+from ..models.sync_source import SyncSource
+from ..models.user import User
 from skills_registry_shared.parsers import parse_skill_md
 from skills_registry_shared.schemas.skill import SkillResponse
 from . import git_service
 from .skill_service import _to_response
 
+logger = logging.getLogger(__name__)
+
+# Stay well below SQLite's bound-parameter limit
+_NAME_QUERY_CHUNK = 500
+
+_parse_executor: ProcessPoolExecutor | None = None
+
+
+@dataclass
+class ImportResult:
+    commit_hash: str
+    added: list[SkillResponse] = field(default_factory=list)
+    updated: list[SkillResponse] = field(default_factory=list)
+    unchanged: int = 0
+    discovered: int = 0  # SKILL.md files found in the repo
+    failed: int = 0  # SKILL.md files that could not be parsed
+
+    @property
+    def skills(self) -> list[SkillResponse]:
+        return self.added + self.updated
+
+    def counts(self) -> dict:
+        return {
+            "discovered": self.discovered,
+            "added": len(self.added),
+            "updated": len(self.updated),
+            "unchanged": self.unchanged,
+            "failed": self.failed,
+        }
+
+
+Progress = Callable[[ImportResult], None]
+
+
+def _parse_chunk(paths: list[tuple[str, str]]) -> list[tuple[str, str, dict, str]]:
+    """Parse and render SKILL.md files; runs in a worker process.
+
+    Returns ``(skill_path, content, fields, readme_html)`` for every parseable
+    file, in input order. Only plain data crosses the process boundary.
+    """
+    results = []
+    for skill_path, skill_md in paths:
+        try:
+            content = open(skill_md, encoding="utf-8").read()
+            meta = parse_skill_md(content)
+        except Exception:
+            continue  # Skip unparseable skills
 
-async def import_from_url(db: AsyncSession, git_url: str, admin_id: int) -> list[SkillResponse]:
+        # Render only the body portion (frontmatter already stripped by parser)
+        readme_html = markdown.markdown(meta.body, extensions=["fenced_code", "tables"])
+        tags = meta.metadata.get("tags", [])
+        fields = {
+            "name": meta.name,
+            "description": meta.description,
+            "version": meta.version,
+            "tags": tags if isinstance(tags, list) else [],
+        }
+        results.append((skill_path, content, fields, readme_html))
+    return results
+
+
+def _get_parse_executor() -> ProcessPoolExecutor | None:
+    global _parse_executor
+    if _parse_executor is None and settings.IMPORT_WORKERS > 0:
+        # spawn, not fork: forking a process that runs an event loop and threads is unsafe
+        _parse_executor = ProcessPoolExecutor(
+            max_workers=settings.IMPORT_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _parse_executor
+
+
+def _discard_parse_executor(broken: ProcessPoolExecutor | None) -> None:
+    """Forget a pool whose worker died (OOM kill, crash); the next import starts a fresh one."""
+    global _parse_executor
+    if broken is None:
+        return
+    if _parse_executor is broken:
+        _parse_executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def _submit_parse(
+    loop: asyncio.AbstractEventLoop, paths: list[tuple[str, str]]
+) -> tuple[ProcessPoolExecutor | None, asyncio.Future]:
+    """Start parsing ``paths``; returns the pool used, so a failure can discard that pool."""
+    executor = _get_parse_executor()
+    try:
+        return executor, loop.run_in_executor(executor, _parse_chunk, paths)
+    except BrokenProcessPool:
+        # Broken by another import that has not replaced it yet
+        _discard_parse_executor(executor)
+        executor = _get_parse_executor()
+        return executor, loop.run_in_executor(executor, _parse_chunk, paths)
+
+
+def shutdown() -> None:
+    """Stop the parse worker processes."""
+    global _parse_executor
+    if _parse_executor is not None:
+        _parse_executor.shutdown(wait=False, cancel_futures=True)
+        _parse_executor = None
+
+
+async def import_from_url(
+    db: AsyncSession, git_url: str, admin_id: int, progress: Progress | None = None
+) -> ImportResult:
     """Import skills from an external git URL."""
-    repo_dir = await git_service.clone_shallow(git_url)
-    imported = []
+    result = await _import(db, git_url, admin_id, git_service.Priority.ADMIN, progress)
+    await db.commit()
+    return result
+
 
+async def sync_source(
+    db: AsyncSession,
+    source: SyncSource,
+    admin_id: int,
+    force: bool = False,
+    priority: git_service.Priority = git_service.Priority.BACKGROUND,
+    progress: Progress | None = None,
+) -> ImportResult | None:
+    """Import a sync source if its remote HEAD moved. Returns None when skipped."""
+    if not force and source.last_commit_hash:
+        head = await git_service.remote_head(source.git_url, priority)
+        if head == source.last_commit_hash:
+            source.last_synced_at = datetime.now(timezone.utc)
+            await db.commit()
+            return None
+
+    # Skill changes and the source bookkeeping land in the same transaction
+    result = await _import(db, source.git_url, admin_id, priority, progress)
+    source.last_commit_hash = result.commit_hash
+    source.last_synced_at = datetime.now(timezone.utc)
+    await db.commit()
+    return result
+
+
+async def _existing_names(db: AsyncSession, names: list[str]) -> set[str]:
+    """Return which of ``names`` are already taken, in as few queries as possible."""
+    existing: set[str] = set()
+    for i in range(0, len(names), _NAME_QUERY_CHUNK):
+        chunk = names[i:i + _NAME_QUERY_CHUNK]
+        result = await db.execute(select(Skill.name).where(Skill.name.in_(chunk)))
+        existing.update(result.scalars())
+    return existing
+
+
+async def _open_transaction(db: AsyncSession) -> None:
+    """Make sure the driver has a transaction open before a SAVEPOINT.
+
+    The sqlite3 driver issues BEGIN only before DML, so a SAVEPOINT sent first
+    runs outside any transaction and releasing it commits. IMMEDIATE takes the
+    write lock up front: a deferred transaction would hold a read lock while
+    waiting for it, deadlocking with a concurrent import trying to commit.
+    """
+    conn = await db.connection()
+    if conn.dialect.name != "sqlite":
+        return
+    raw = await conn.get_raw_connection()
+    if not raw.driver_connection.in_transaction:
+        await conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+async def _insert_new(db: AsyncSession, skills: list[Skill]) -> list[Skill]:
+    """Insert ``skills`` in one batch; returns those inserted.
+
+    A concurrent import may have taken some names since they were checked.
+    Then the batch is retried row by row and the conflicting rows are dropped.
+    """
+    await _open_transaction(db)
     try:
-        commit_hash = await git_service.get_commit_hash(repo_dir)
+        # One batched INSERT; flush assigns ids and defaults, so no per-row refresh is needed
+        async with db.begin_nested():
+            db.add_all(skills)
+            await db.flush()
+        return skills
+    except IntegrityError:
+        pass
+
+    inserted = []
+    for skill in skills:
+        try:
+            async with db.begin_nested():
+                db.add(skill)
+                await db.flush()
+            inserted.append(skill)
+        except IntegrityError:
+            logger.info(f"Skipped skill '{skill.name}': name was taken by a concurrent import.")
+    return inserted
+
+
+async def _import(
+    db: AsyncSession,
+    git_url: str,
+    admin_id: int,
+    priority: git_service.Priority,
+    progress: Progress | None = None,
+) -> ImportResult:
+    """Upsert every skill in the repo into the session and flush; the caller commits.
+
+    Skills previously imported from ``git_url`` are updated in place when their
+    directory's content hash changed and left untouched otherwise. Names owned
+    by other sources are never overwritten.
+    """
+    # Only SKILL.md files are needed, so skip every other blob in the repo
+    repo_dir = await git_service.clone_shallow(
+        git_url, sparse=[f"/{p}" for p in git_service.SKILL_MD_PATTERNS], priority=priority
+    )
+
+    try:
+        result = ImportResult(commit_hash=await git_service.get_commit_hash(repo_dir))
         discovered = await git_service.discover_skills(repo_dir)
+        result.discovered = len(discovered)
+        if progress:
+            progress(result)
+        hashes = await git_service.tree_hashes(repo_dir, [info["path"] for info in discovered])
+        author = await db.get(User, admin_id)
+
+        owned_rows = await db.execute(select(Skill).where(Skill.git_url == git_url))
+        owned = {s.name: s for s in owned_rows.scalars()}
+        owned_by_path = {s.skill_path: s for s in owned.values()}
 
+        # Unchanged directories are settled by hash alone, without reading SKILL.md
+        seen: set[str] = set()
+        paths = []
         for info in discovered:
-            skill_md_path = info["skill_md"]
-            skill_path = info["path"]
-
-            try:
-                content = open(skill_md_path, encoding="utf-8").read()
-                meta = parse_skill_md(content)
-            except Exception:
-                continue  # Skip unparseable skills
-
-            # Check if already exists
-            existing = await db.execute(select(Skill).where(Skill.name == meta.name))
-            if existing.scalar_one_or_none():
-                continue  # Skip duplicates
-
-            # Render only the body portion (frontmatter already stripped by parser)
-            readme_html = markdown.markdown(meta.body, extensions=["fenced_code", "tables"])
-
-            skill = Skill(
-                name=meta.name,
-                description=meta.description,
-                version=meta.version,
-                git_url=git_url,
-                commit_hash=commit_hash,
-                skill_path=skill_path,
-                readme_content=content,
-                readme_html=readme_html,
-                source="external",
-                author_id=admin_id,
-            )
-            tags = meta.metadata.get("tags", [])
-            if isinstance(tags, list):
-                skill.tags = tags
-            else:
-                skill.tags = []
-
-            db.add(skill)
-            await db.commit()
-            await db.refresh(skill)
-            imported.append(_to_response(skill))
+            row = owned_by_path.get(info["path"])
+            if row is not None and row.content_hash and row.content_hash == hashes.get(info["path"]):
+                if row.name not in seen:
+                    seen.add(row.name)
+                    result.unchanged += 1
+                continue
+            paths.append((info["path"], info["skill_md"]))
+
+        # Parse and render off the event loop in chunks; each chunk is written
+        # as soon as it (and every chunk before it) is done, so DB work overlaps parsing
+        loop = asyncio.get_running_loop()
+        size = max(1, settings.IMPORT_CHUNK_SIZE)
+        chunks = [
+            (paths[i:i + size], *_submit_parse(loop, paths[i:i + size]))
+            for i in range(0, len(paths), size)
+        ]
+
+        rebuilt = False
+        try:
+            for n in range(len(chunks)):
+                chunk_paths, executor, chunk = chunks[n]
+                try:
+                    parsed = await chunk
+                except BrokenProcessPool:
+                    # A worker died (OOM kill, crash): resubmit what the pool still held, once
+                    _discard_parse_executor(executor)
+                    if rebuilt:
+                        raise
+                    rebuilt = True
+                    logger.warning(f"A parse worker died while importing '{git_url}'; retrying on a new process pool.")
+                    for _, e, c in chunks[n + 1:]:
+                        if e is executor:  # superseded by the resubmission below
+                            c.add_done_callback(lambda f: f.cancelled() or f.exception())
+                    chunks[n:] = [
+                        (p, *_submit_parse(loop, p)) if e is executor else (p, e, c) for p, e, c in chunks[n:]
+                    ]
+                    chunk_paths, executor, chunk = chunks[n]
+                    parsed = await chunk
+                result.failed += len(chunk_paths) - len(parsed)
+                taken = await _existing_names(db, [p[2]["name"] for p in parsed if p[2]["name"] not in owned])
+                added, updated = [], []
+                for skill_path, content, fields, readme_html in parsed:
+                    name = fields["name"]
+                    if name in seen:
+                        continue  # First path wins within a repo
+                    seen.add(name)
+
+                    row = owned.get(name)
+                    if row is not None:
+                        row.description = fields["description"]
+                        row.version = fields["version"]
+                        row.tags = fields["tags"]
+                        row.readme_content = content
+                        row.readme_html = readme_html
+                        row.skill_path = skill_path
+                        row.commit_hash = result.commit_hash
+                        row.content_hash = hashes.get(skill_path)
+                        updated.append(row)
+                        continue
+                    if name in taken:
+                        continue  # Owned by another source or registered internally
+
+                    skill = Skill(
+                        name=name,
+                        description=fields["description"],
+                        version=fields["version"],
+                        git_url=git_url,
+                        commit_hash=result.commit_hash,
+                        content_hash=hashes.get(skill_path),
+                        skill_path=skill_path,
+                        readme_content=content,
+                        readme_html=readme_html,
+                        source="external",
+                        author_id=admin_id,
+                        installs=0,
+                    )
+                    skill.author = author
+                    skill.tags = fields["tags"]
+                    added.append(skill)
+
+                await db.flush()  # updates first, so a failed insert batch cannot roll them back
+                added = await _insert_new(db, added)
+                result.added.extend(_to_response(s) for s in added)
+                result.updated.extend(_to_response(s) for s in updated)
+                if progress:
+                    progress(result)
+        finally:
+            for _, _, chunk in chunks:
+                chunk.cancel()
     finally:
         git_service.cleanup(repo_dir)
 
-    return imported
+    return result
@@ -0,0 +1,241 @@
+"""Import and sync jobs that run in the background.
+
+Jobs are rows in ``import_jobs``, so a client can poll them and unfinished
+jobs are picked up again after a restart. Re-running an interrupted job is
+safe because imports upsert. While a job runs, its progress counts are held
+in memory and copied to the row with every heartbeat, so a poll answered by
+another worker lags by at most a heartbeat interval. On SQLite the import's
+own transaction holds the only write lock once it starts writing; until it
+commits, other workers see the counts of the last heartbeat before that.
+
+The worker that claims a job records itself as the owner and renews a
+heartbeat every third of LEASE_TTL. A running job is taken over only once
+its heartbeat is older than LEASE_TTL, i.e. its worker died or hung.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..database import async_session
+from ..models.import_job import ImportJob
+from ..models.sync_source import SyncSource
+from . import git_service, import_service, lease
+
+logger = logging.getLogger(__name__)
+
+_slots = asyncio.Semaphore(settings.IMPORT_MAX_JOBS)
+_tasks: dict[int, asyncio.Task] = {}
+_progress: dict[int, import_service.ImportResult] = {}
+
+
+async def enqueue(
+    db: AsyncSession,
+    kind: str,
+    git_url: str,
+    created_by: int,
+    source_id: int | None = None,
+    force: bool = False,
+) -> ImportJob:
+    """Persist a new job and start it in the background."""
+    job = ImportJob(kind=kind, git_url=git_url, source_id=source_id, force=force, created_by=created_by)
+    db.add(job)
+    await db.commit()
+    _start(job.id)
+    return job
+
+
+def _now() -> datetime:
+    # Naive UTC, like the lease timestamps it is compared with
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _claimable(take_over: bool):
+    """Jobs nobody runs: queued ones, and with ``take_over`` running ones whose worker went silent."""
+    if not take_over:
+        return ImportJob.status == "queued"
+    stale = _now() - timedelta(seconds=settings.LEASE_TTL)
+    abandoned = (
+        (ImportJob.status == "running")
+        & ((ImportJob.owner != lease.OWNER) | ImportJob.owner.is_(None))
+        & (ImportJob.heartbeat_at.is_(None) | (ImportJob.heartbeat_at < stale))
+    )
+    return (ImportJob.status == "queued") | abandoned
+
+
+def _start(job_id: int, take_over: bool = False) -> None:
+    if job_id in _tasks:
+        return  # already running here
+    task = asyncio.create_task(_run(job_id, take_over))
+    _tasks[job_id] = task
+    task.add_done_callback(lambda t: _finished(job_id, t))
+
+
+def _finished(job_id: int, task: asyncio.Task) -> None:
+    _tasks.pop(job_id, None)
+    _progress.pop(job_id, None)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Import job {job_id} crashed: {task.exception()!r}")
+
+
+async def _execute(db: AsyncSession, job: ImportJob) -> import_service.ImportResult | None:
+    def progress(result: import_service.ImportResult) -> None:
+        _progress[job.id] = result
+
+    if job.kind == "sync":
+        source = await db.get(SyncSource, job.source_id)
+        if source is None or not source.is_active:
+            raise LookupError("Sync source not found")
+        return await import_service.sync_source(
+            db, source, admin_id=job.created_by, force=job.force,
+            priority=git_service.Priority.ADMIN, progress=progress,
+        )
+    return await import_service.import_from_url(db, job.git_url, admin_id=job.created_by, progress=progress)
+
+
+async def _heartbeat(job_id: int, runner: asyncio.Task) -> None:
+    """Renew the job's heartbeat in its own session; stop the job if another worker took it over."""
+    while True:
+        await asyncio.sleep(settings.LEASE_TTL / 3)
+        try:
+            async with async_session() as db:
+                live = _progress.get(job_id)
+                result = await db.execute(
+                    update(ImportJob)
+                    .where(ImportJob.id == job_id, ImportJob.owner == lease.OWNER, ImportJob.status == "running")
+                    .values(heartbeat_at=_now(), **(live.counts() if live else {}))
+                )
+                await db.commit()
+        except OperationalError as e:
+            # SQLite: the import itself holds the write lock, which also keeps other workers from claiming the job
+            if "database is locked" not in str(e):
+                logger.warning(f"Import job {job_id}: heartbeat failed: {e}")
+            continue
+        except Exception as e:
+            logger.warning(f"Import job {job_id}: heartbeat failed: {e}")
+            continue
+        if result.rowcount == 0:
+            logger.warning(f"Import job {job_id} was taken over by another worker; stopping here.")
+            runner.cancel()
+            return
+
+
+async def _run(job_id: int, take_over: bool) -> None:
+    async with _slots, async_session() as db:
+        # Claim atomically, so a job is never started twice by different workers
+        claimed = await db.execute(
+            update(ImportJob)
+            .where(ImportJob.id == job_id, _claimable(take_over))
+            .values(status="running", started_at=datetime.now(timezone.utc), owner=lease.OWNER, heartbeat_at=_now())
+        )
+        await db.commit()
+        if claimed.rowcount == 0:
+            return
+        job = await db.get(ImportJob, job_id)
+        git_url = job.git_url
+
+        heartbeat = asyncio.create_task(_heartbeat(job_id, asyncio.current_task()))
+        try:
+            try:
+                result = await _execute(db, job)
+            except Exception as e:
+                await db.rollback()
+                # Nothing was written, but keep how far discovery got; heartbeats may have stored partial counts
+                partial = _progress.get(job_id)
+                outcome = {
+                    "status": "failed", "error": str(e)[:2000], "discovered": partial.discovered if partial else 0,
+                    "added": 0, "updated": 0, "unchanged": 0, "failed": 0,
+                }
+                logger.error(f"Import job {job_id} for '{git_url}' failed: {e}")
+            else:
+                outcome = {"status": "succeeded", "skipped": result is None}
+                if result is not None:
+                    outcome.update(result.counts(), commit_hash=result.commit_hash)
+            outcome["finished_at"] = datetime.now(timezone.utc)
+            # Commits the import together with its outcome, unless another worker took the job over
+            recorded = await db.execute(
+                update(ImportJob).where(ImportJob.id == job_id, ImportJob.owner == lease.OWNER).values(**outcome)
+            )
+            if recorded.rowcount == 0:
+                logger.warning(f"Import job {job_id} was taken over by another worker; discarding this run.")
+                await db.rollback()
+            else:
+                await db.commit()
+        finally:
+            heartbeat.cancel()
+
+
+async def resume() -> None:
+    """Start queued jobs and take over running ones whose worker stopped heartbeating.
+
+    Called by the lease holder only; see main.leader_work.
+    """
+    async with async_session() as db:
+        result = await db.execute(select(ImportJob.id).where(_claimable(take_over=True)).order_by(ImportJob.id))
+        job_ids = [job_id for job_id in result.scalars() if job_id not in _tasks]
+    for job_id in job_ids:
+        _start(job_id, take_over=True)
+    if job_ids:
+        logger.info(f"Resumed {len(job_ids)} unfinished import job(s).")
+
+
+async def run() -> None:
+    """Resume unfinished jobs now and every LEASE_TTL seconds, for workers that die later."""
+    while True:
+        try:
+            await resume()
+        except Exception as e:
+            logger.error(f"Resuming import jobs failed: {e}")
+        await asyncio.sleep(settings.LEASE_TTL)
+
+
+def shutdown() -> None:
+    """Stop running jobs; they stay in the table and are taken over once their heartbeat is stale."""
+    for task in list(_tasks.values()):
+        task.cancel()
+
+
+def _utc(dt: datetime) -> datetime:
+    """Databases hand back naive datetimes; stored datetimes are always UTC."""
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
+
+
+def to_dict(job: ImportJob) -> dict:
+    counts = {
+        "discovered": job.discovered,
+        "added": job.added,
+        "updated": job.updated,
+        "unchanged": job.unchanged,
+        "failed": job.failed,
+    }
+    live = _progress.get(job.id)
+    if job.status == "running" and live is not None:
+        counts = live.counts()
+    duration = None
+    if job.started_at:
+        end = _utc(job.finished_at) if job.finished_at else datetime.now(timezone.utc)
+        duration = round((end - _utc(job.started_at)).total_seconds(), 3)
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "git_url": job.git_url,
+        "source_id": job.source_id,
+        "status": job.status,
+        **counts,
+        "skipped": job.skipped,
+        "commit_hash": job.commit_hash,
+        "error": job.error,
+        "created_at": job.created_at.isoformat(),
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "duration": duration,
+    }
+
+
+def stats() -> dict:
+    return {"max_concurrent": settings.IMPORT_MAX_JOBS, "in_progress": len(_tasks)}
@@ -0,0 +1,135 @@
+"""Database-backed leases for work that must run in one process only.
+
+With several uvicorn workers or replicas, each process competes for a named
+lease row. The holder renews it every third of LEASE_TTL. If the holder dies,
+the lease expires and a standby takes it over. Expiry uses each process's
+own clock, so hosts are assumed to be NTP-synced.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+
+from sqlalchemy import case, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..database import async_session
+from ..models.lease import Lease
+
+logger = logging.getLogger(__name__)
+
+# Unique per process, even across restarts that reuse a pid
+OWNER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+_held: set[str] = set()
+
+
+def _now() -> datetime:
+    # Stored naive, like every other DateTime column
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+async def acquire(name: str, ttl: int) -> bool:
+    """Take or renew lease ``name`` for ``ttl`` seconds. Returns whether we hold it."""
+    now = _now()
+    async with async_session() as db:
+        result = await db.execute(
+            update(Lease)
+            .where(Lease.name == name, (Lease.owner == OWNER) | (Lease.expires_at < now))
+            .values(
+                owner=OWNER,
+                acquired_at=case((Lease.owner == OWNER, Lease.acquired_at), else_=now),
+                renewed_at=now,
+                expires_at=now + timedelta(seconds=ttl),
+            )
+        )
+        if result.rowcount == 0:
+            # No row yet, or someone else holds it — only the insert can tell
+            db.add(Lease(name=name, owner=OWNER, acquired_at=now, renewed_at=now,
+                         expires_at=now + timedelta(seconds=ttl)))
+            try:
+                await db.flush()
+            except IntegrityError:
+                return False
+        await db.commit()
+    return True
+
+
+async def release(name: str) -> None:
+    """Expire lease ``name`` now if we hold it, so a standby need not wait out the TTL."""
+    async with async_session() as db:
+        await db.execute(
+            update(Lease).where(Lease.name == name, Lease.owner == OWNER).values(expires_at=_now())
+        )
+        await db.commit()
+
+
+async def _still_leader(name: str, ttl: int, task: asyncio.Task) -> bool:
+    """Wait one heartbeat, then renew the lease. False means step down."""
+    await asyncio.sleep(ttl / 3)
+    if task.done():
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Lease '{name}': work crashed: {task.exception()!r}")
+        return False
+    try:
+        if await acquire(name, ttl):
+            return True
+        logger.warning(f"Lease '{name}': taken over by another process.")
+    except Exception as e:
+        logger.error(f"Lease '{name}': renewal failed, stepping down: {e}")
+    return False
+
+
+async def run_as_leader(name: str, work: Callable[[], Awaitable[None]]) -> None:
+    """Run ``work`` whenever this process holds lease ``name``; forever.
+
+    ``work`` is cancelled as soon as a renewal fails, since another process may
+    take over once the lease expires.
+    """
+    ttl = settings.LEASE_TTL
+    while True:
+        try:
+            leader = await acquire(name, ttl)
+        except Exception as e:
+            logger.error(f"Lease '{name}': acquire failed: {e}")
+            leader = False
+        if not leader:
+            await asyncio.sleep(ttl / 3)
+            continue
+
+        logger.info(f"Lease '{name}': acquired by {OWNER}.")
+        _held.add(name)
+        task = asyncio.create_task(work())
+        try:
+            while await _still_leader(name, ttl, task):
+                pass
+        finally:
+            _held.discard(name)
+            task.cancel()
+            try:
+                await release(name)
+            except Exception:
+                pass  # it expires on its own
+
+
+async def state(db: AsyncSession) -> list[dict]:
+    result = await db.execute(select(Lease).order_by(Lease.name))
+    now = _now()
+    return [
+        {
+            "name": lease.name,
+            "owner": lease.owner,
+            "held_by_this_process": lease.name in _held and lease.owner == OWNER,
+            "expired": lease.expires_at < now,
+            "acquired_at": lease.acquired_at.isoformat(),
+            "renewed_at": lease.renewed_at.isoformat(),
+            "expires_at": lease.expires_at.isoformat(),
+        }
+        for lease in result.scalars().all()
+    ]
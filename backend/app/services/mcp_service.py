@@ -9,6 +9,7 @@ from ..models.install_log import InstallLog
 from skills_registry_shared.schemas.mcp import MCPServerCreate, MCPServerResponse, MCPInstallConfig
 from skills_registry_shared.schemas.user import UserBrief
 from skills_registry_shared.schemas.common import PaginatedResult
+from . import ngram_index, pagination, search_index, tag_index
 
 
 def _to_response(m: MCPServer) -> MCPServerResponse:
@@ -64,33 +65,37 @@ async def get_by_id(db: AsyncSession, mcp_id: int) -> MCPServerResponse | None:
 async def search(
     db: AsyncSession,
     keyword: str | None = None,
-    tag: str | None = None,
+    tags: list[str] | None = None,
+    tag_match: str = "all",
     page: int = 1,
     size: int = 20,
+    cursor: str | None = None,
+    total: str = "exact",
+    fuzzy: bool = False,
 ) -> PaginatedResult[MCPServerResponse]:
     query = select(MCPServer)
     count_query = select(func.count(MCPServer.id))
 
+    filt = tag_index.filter_clause(MCPServer, tags, tag_match) if tags else None
+    if keyword and fuzzy:
+        ids = ngram_index.search("mcp", keyword)
+        if ids is not None:
+            return await pagination.fetch_ranked(
+                db, MCPServer, ids, _to_response, where=filt, page=page, size=size, cursor=cursor, total=total
+            )
+
+    rank = None
     if keyword:
-        kw = f"%{keyword.lower()}%"
-        filt = func.lower(MCPServer.name).like(kw) | func.lower(MCPServer.description).like(kw)
+        query, rank = search_index.apply(query, MCPServer, keyword)
+        count_query, _ = search_index.apply(count_query, MCPServer, keyword)
+    if filt is not None:
         query = query.where(filt)
         count_query = count_query.where(filt)
 
-    total_result = await db.execute(count_query)
-    total = total_result.scalar() or 0
-
-    query = query.order_by(MCPServer.installs.desc()).offset((page - 1) * size).limit(size)
-    result = await db.execute(query)
-    mcps = result.scalars().all()
-
-    if tag:
-        mcps = [m for m in mcps if tag in m.tags]
-        total = len(mcps)
-
-    items = [_to_response(m) for m in mcps]
-    pages = (total + size - 1) // size if total > 0 else 0
-    return PaginatedResult(items=items, total=total, page=page, size=size, pages=pages)
+    return await pagination.fetch_page(
+        db, query, count_query, [MCPServer.installs, MCPServer.id], _to_response,
+        rank=rank, page=page, size=size, cursor=cursor, total=total,
+    )
 
 
 async def list_top(db: AsyncSession, limit: int = 10) -> list[MCPServerResponse]:
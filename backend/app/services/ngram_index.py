@@ -0,0 +1,500 @@
+"""In-memory n-gram index for typo-tolerant and CJK search.
+
+Asset names and tags (the title) and descriptions (the body) are split into
+terms, each with its own postings list. Latin-script words are terms and
+are also indexed by their padded character trigrams, so a query word is
+expanded to every known term that shares most of its trigrams with it, or
+that contains it: misspellings and partial words still find the right
+assets. Chinese,
+Japanese and Korean runs have no spaces between words and are indexed as
+character bigrams (plus single characters) that must match exactly.
+
+Every process keeps its own index, built from the database at startup. The
+process's own commits are applied right away through session events; writes
+made by other workers or replicas are picked up by a periodic refresh that
+follows ``updated_at`` and the row count, so the index never needs a shared
+store.
+
+Matches are returned as asset ids in rank order; callers load the rows.
+The same index keeps a sorted list of asset names, keyed at every word
+start and weighted by installs, for search-as-you-type suggestions.
+"""
+
+import asyncio
+import bisect
+import hashlib
+import heapq
+import json
+import logging
+import re
+import time
+import unicodedata
+from array import array
+from collections import Counter
+from datetime import datetime, timedelta
+from operator import itemgetter
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from ..database import async_session
+from ..models.agent_config import AgentConfig
+from ..models.mcp_server import MCPServer
+from ..models.skill import Skill
+
+logger = logging.getLogger(__name__)
+
+ASSET_TYPES = {Skill: "skill", MCPServer: "mcp", AgentConfig: "agent"}
+
+_TERM_SIMILARITY = 0.4  # trigram similarity for a term to stand in for a query word
+_MAX_EXPANSIONS = 20  # most similar terms tried per query word
+_MIN_MATCH = 0.5  # share of the query words a field must match
+_COMMON_SHARE = 0.2  # words in more documents than this are dropped from longer queries
+_MAX_RESULTS = 1000
+_ID_CHUNK = 500
+# Rows are stamped at flush but seen at commit; look back this far for late commits
+_REFRESH_SLACK = timedelta(minutes=10)
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_NAME_WORD_RE = re.compile(r"[^\W_]+", re.UNICODE)
+_SHORT_PREFIX = 2  # suggestions for prefixes up to this long are cached until names change or a refresh
+_CJK_RE = re.compile(r"([\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+)")
+
+_TEXT_ATTRS = ("name", "description", "_tags")
+
+_indexes: dict[str, "_Index"] | None = None  # None until the first build finishes
+_build_seconds: float | None = None
+
+
+def _split(text: str) -> list[tuple[str, bool]]:
+    """Normalized runs of ``text`` as ``(run, is_cjk)``."""
+    runs = []
+    for word in _WORD_RE.findall(unicodedata.normalize("NFKC", text).lower()):
+        for i, run in enumerate(_CJK_RE.split(word)):
+            if run:
+                runs.append((run, bool(i % 2)))
+    return runs
+
+
+def _cjk_terms(run: str) -> list[str]:
+    return [run] if len(run) == 1 else [run[j:j + 2] for j in range(len(run) - 1)]
+
+
+def terms(text: str) -> set[str]:
+    """Index terms of ``text``: words, and CJK bigrams plus single characters."""
+    out: set[str] = set()
+    for run, cjk in _split(text):
+        if cjk:
+            out.update(_cjk_terms(run))
+            out.update(run)
+        else:
+            out.add(run)
+    return out
+
+
+def _normalize(text: str) -> str:
+    return unicodedata.normalize("NFKC", text).lower()
+
+
+def _name_keys(name: str) -> list[tuple[str, bool]]:
+    """Suggestion keys of an asset name: the name, and its rest from every later word on."""
+    name = _normalize(name)
+    later = {name[m.start():] for m in _NAME_WORD_RE.finditer(name) if m.start() > 0}
+    return [(name, True), *((key, False) for key in later - {name})]
+
+
+def trigrams(word: str) -> set[str]:
+    padded = f"  {word} "
+    return {padded[j:j + 3] for j in range(len(padded) - 2)}
+
+
+def _fingerprint(title: str, body: str) -> bytes:
+    return hashlib.blake2b(f"{title}\0{body}".encode(), digest_size=8).digest()
+
+
+def _fields(name: str, description: str, raw_tags: str) -> tuple[str, str]:
+    """Title and body text of an asset; ``raw_tags`` is the stored JSON list."""
+    try:
+        tags = json.loads(raw_tags) if raw_tags else []
+    except ValueError:
+        tags = []
+    tags = [t for t in tags if isinstance(t, str)] if isinstance(tags, list) else []
+    return " ".join([name, *tags]), description or ""
+
+
+class _Index:
+    """Postings of one asset type: name and tags as the title, description as the body."""
+
+    def __init__(self):
+        self.ids: list[int | None] = []  # docno -> asset id; None once removed or replaced
+        self.docno: dict[int, int] = {}
+        self.fingerprints: dict[int, bytes] = {}  # asset id -> hash of its indexed text
+        self.checked: tuple[int, datetime | None] | None = None  # (row count, newest updated_at) last seen
+        self.title: dict[str, array] = {}
+        self.body: dict[str, array] = {}
+        self.words: dict[str, list[str]] = {}  # trigram -> Latin-script terms containing it
+        self._sorted_words: list[str] | None = []  # for prefix lookups; None when stale
+        self.names: dict[int, str] = {}
+        self.installs: dict[int, int] = {}
+        self.name_keys: list[tuple[str, int, bool]] = []  # sorted (key, asset id, key is the whole name)
+        self._suggested: dict[str, tuple[int, list[tuple[tuple, int]]]] = {}  # prefix -> (limit, suggestions)
+
+    @property
+    def garbage(self) -> int:
+        return len(self.ids) - len(self.docno)
+
+    def add(self, asset_id: int, title: str, body: str) -> None:
+        self.remove(asset_id)
+        docno = len(self.ids)
+        self.ids.append(asset_id)
+        self.docno[asset_id] = docno
+        self.fingerprints[asset_id] = _fingerprint(title, body)
+        for postings, text in ((self.title, title), (self.body, body)):
+            for term in terms(text):
+                entry = postings.get(term)
+                if entry is not None:
+                    entry.append(docno)
+                    continue
+                postings[term] = array("i", (docno,))
+                other = self.body if postings is self.title else self.title
+                if term not in other and not _CJK_RE.match(term):
+                    for gram in trigrams(term):
+                        self.words.setdefault(gram, []).append(term)
+                    self._sorted_words = None
+
+    def remove(self, asset_id: int) -> None:
+        docno = self.docno.pop(asset_id, None)
+        self.fingerprints.pop(asset_id, None)
+        if docno is not None:
+            self.ids[docno] = None
+        self._unname(asset_id)
+        self.installs.pop(asset_id, None)
+
+    def name(self, asset_id: int, name: str, installs: int, bulk: bool = False) -> None:
+        """Register the name and install count that suggestions rank by.
+
+        With ``bulk``, keys are appended unsorted; call ``sort_names`` afterwards.
+        """
+        self.installs[asset_id] = installs
+        if self.names.get(asset_id) == name:
+            return
+        self._unname(asset_id)
+        self.names[asset_id] = name
+        for key, whole in _name_keys(name):
+            if bulk:
+                self.name_keys.append((key, asset_id, whole))
+            else:
+                bisect.insort(self.name_keys, (key, asset_id, whole))
+        self._suggested.clear()
+
+    def sort_names(self) -> None:
+        self.name_keys.sort()
+
+    def rerank(self) -> None:
+        """Let cached suggestions pick up changed install counts."""
+        self._suggested.clear()
+
+    def _unname(self, asset_id: int) -> None:
+        name = self.names.pop(asset_id, None)
+        if name is None:
+            return
+        for key, whole in _name_keys(name):
+            i = bisect.bisect_left(self.name_keys, (key, asset_id, whole))
+            if i < len(self.name_keys) and self.name_keys[i] == (key, asset_id, whole):
+                del self.name_keys[i]
+        self._suggested.clear()
+
+    def suggest(self, prefix: str, limit: int) -> list[tuple[tuple, int]]:
+        """``(rank, asset id)`` of the best names completing ``prefix``, best first.
+
+        Names starting with the prefix come before names with a later word
+        starting with it; within each group, more installs come first.
+        """
+        prefix = _normalize(prefix).strip()
+        if not prefix:
+            return []
+        short = len(prefix) <= _SHORT_PREFIX
+        cached_limit, cached = self._suggested.get(prefix, (0, []))
+        if short and cached_limit >= limit:
+            return cached[:limit]
+        lo = bisect.bisect_left(self.name_keys, (prefix,))
+        hi = bisect.bisect_left(self.name_keys, (prefix + "\U0010ffff",))
+        starts, later = set(), set()
+        for _, asset_id, whole in self.name_keys[lo:hi]:
+            (starts if whole else later).add(asset_id)
+        later -= starts
+        installs = self.installs
+        best = [((1, installs[i]), i) for i in heapq.nlargest(limit, starts, key=installs.__getitem__)]
+        if len(best) < limit:
+            best += [((0, installs[i]), i) for i in heapq.nlargest(limit - len(best), later, key=installs.__getitem__)]
+        if short:
+            self._suggested[prefix] = (limit, best)
+        return best
+
+    def _expand(self, word: str, prefix: bool) -> list[tuple[str, float]]:
+        """Known terms that may stand for ``word``, with their similarity, best first."""
+        grams = trigrams(word)
+        shared: Counter = Counter()
+        if not word.isdigit():  # a mistyped number is another number; match numbers exactly
+            for gram in grams:
+                shared.update(self.words.get(gram, ()))
+        similar = {word: 1.0}
+        for term, n in shared.items():
+            # Jaccard similarity of the two trigram sets (len(term) + 1 trigrams)
+            sim = n / (len(grams) + len(term) + 1 - n)
+            if sim >= _TERM_SIMILARITY:
+                similar[term] = max(similar.get(term, 0.0), sim)
+        if len(word) >= 3:
+            # Words containing the query word, as LIKE '%word%' finds them: every
+            # such term holds the word's inner trigrams, so scan the rarest one's terms
+            inner = [word[j:j + 3] for j in range(len(word) - 2)]
+            for term in min((self.words.get(gram, ()) for gram in inner), key=len):
+                if word in term:
+                    similar[term] = max(similar.get(term, 0.0), 0.4 + 0.4 * len(word) / len(term))
+        if prefix and len(word) >= 2:
+            # The last word may still be being typed: its completions are full matches
+            if self._sorted_words is None:
+                self._sorted_words = sorted({t for ts in self.words.values() for t in ts})
+            i = bisect.bisect_right(self._sorted_words, word)
+            for term in self._sorted_words[i:i + _MAX_EXPANSIONS]:
+                if not term.startswith(word):
+                    break
+                similar[term] = max(similar.get(term, 0.0), 0.5 + 0.5 * len(word) / len(term))
+        return heapq.nlargest(_MAX_EXPANSIONS, similar.items(), key=lambda item: item[1])
+
+    def _query(self, text: str) -> list[list[tuple[str, float]]]:
+        """Alternative terms for every query word; CJK terms match only themselves."""
+        runs = _split(text)
+        query = []
+        for i, (run, cjk) in enumerate(runs):
+            if cjk:
+                query.extend([(term, 1.0)] for term in _cjk_terms(run))
+            else:
+                query.append(self._expand(run, prefix=i == len(runs) - 1))
+        # Words in most documents (like "the") only slow a longer query down
+        common = _COMMON_SHARE * len(self.docno)
+        rare = [alternatives for alternatives in query if self._frequency(alternatives[0][0]) <= common]
+        return [self._enough(alternatives) for alternatives in rare or query]
+
+    def _frequency(self, term: str) -> int:
+        return len(self.title.get(term, ())) + len(self.body.get(term, ()))
+
+    def _enough(self, alternatives: list[tuple[str, float]]) -> list[tuple[str, float]]:
+        """The best alternatives, until they match more documents than can be returned."""
+        kept, found = [], 0
+        for term, sim in alternatives:
+            if found >= _MAX_RESULTS:
+                break
+            kept.append((term, sim))
+            found += self._frequency(term)
+        return kept
+
+    def _field_scores(self, postings: dict[str, array], query: list[list[tuple[str, float]]]) -> dict[int, float]:
+        """Summed best similarity of the query words per document, for documents matching enough of them."""
+        needed = _MIN_MATCH * len(query)
+        total: dict[int, float] = {}
+        hits: dict[int, int] = {}
+        for i, alternatives in enumerate(query):
+            best: dict[int, float] = {}
+            for term, sim in alternatives:  # best first, so the first match of a document wins
+                entry = postings.get(term)
+                if entry is not None:
+                    best.update(dict.fromkeys(set(entry).difference(best), sim) if best else dict.fromkeys(entry, sim))
+            if i == 0:
+                total, hits = best, dict.fromkeys(best, 1)
+            elif needed <= 1:
+                for docno, sim in best.items():
+                    total[docno] = total.get(docno, 0.0) + sim
+            else:
+                for docno, sim in best.items():
+                    total[docno] = total.get(docno, 0.0) + sim
+                    hits[docno] = hits.get(docno, 0) + 1
+        if needed <= 1:
+            return total
+        return {docno: score for docno, score in total.items() if hits.get(docno, 0) >= needed}
+
+    def search(self, text: str, limit: int) -> list[int]:
+        query = self._query(text)
+        if not query:
+            return []
+        title = self._field_scores(self.title, query)
+        scores = self._field_scores(self.body, query)
+        for docno, score in title.items():
+            scores[docno] = scores.get(docno, 0.0) + 2.0 * score  # name and tag matches weigh double
+        ids = self.ids
+        best = heapq.nlargest(limit, ((d, s) for d, s in scores.items() if ids[d] is not None), key=itemgetter(1))
+        return [ids[d] for d, _ in best]
+
+
+def _build(rows: dict[str, list[tuple]]) -> dict[str, _Index]:
+    indexes = {}
+    for asset_type, type_rows in rows.items():
+        index = _Index()
+        for asset_id, name, description, raw_tags, installs in type_rows:
+            index.add(asset_id, *_fields(name, description, raw_tags))
+            index.name(asset_id, name, installs, bulk=True)
+        index.sort_names()
+        indexes[asset_type] = index
+    return indexes
+
+
+def _select_rows(model):
+    return select(model.id, model.name, model.description, model._tags, model.installs)
+
+
+async def _check(db, model) -> tuple[int, datetime | None]:
+    result = await db.execute(select(func.count(model.id), func.max(model.updated_at)))
+    count, newest = result.one()
+    return count, newest
+
+
+async def build() -> None:
+    """Load every asset and replace the index; the build runs in a worker thread."""
+    global _indexes, _build_seconds
+    started = time.monotonic()
+    rows, checked = {}, {}
+    async with async_session() as db:
+        for model, asset_type in ASSET_TYPES.items():
+            checked[asset_type] = await _check(db, model)
+            result = await db.execute(_select_rows(model))
+            rows[asset_type] = [tuple(r) for r in result]
+    indexes = await asyncio.to_thread(_build, rows)
+    for asset_type, index in indexes.items():
+        index.checked = checked[asset_type]
+    _indexes = indexes
+    _build_seconds = round(time.monotonic() - started, 3)
+    logger.info(f"Built n-gram search index of {sum(len(r) for r in rows.values())} assets in {_build_seconds}s.")
+    # Commits made while building were applied to the old index
+    await refresh()
+
+
+async def _catch_up(db, model, index: _Index) -> None:
+    count, newest = await _check(db, model)
+    if index.checked == (count, newest):
+        return
+
+    # Every ORM write bumps updated_at, so recent rows cover inserts and updates
+    query = _select_rows(model)
+    if index.checked is not None and index.checked[1] is not None:
+        query = query.where(model.updated_at >= index.checked[1] - _REFRESH_SLACK)
+    rows = (await db.execute(query)).all()
+    if count != len(index.docno) + sum(1 for row in rows if row[0] not in index.docno):
+        # Deleted elsewhere, or committed too late for the window: compare ids
+        ids = set((await db.execute(select(model.id))).scalars())
+        for asset_id in [i for i in index.docno if i not in ids]:
+            index.remove(asset_id)
+        missing = [i for i in ids if i not in index.docno]
+        for i in range(0, len(missing), _ID_CHUNK):
+            rows += (await db.execute(_select_rows(model).where(model.id.in_(missing[i:i + _ID_CHUNK])))).all()
+
+    for asset_id, name, description, raw_tags, installs in rows:
+        title, body = _fields(name, description, raw_tags)
+        if index.fingerprints.get(asset_id) != _fingerprint(title, body):  # not e.g. an install count bump
+            index.add(asset_id, title, body)
+        index.name(asset_id, name, installs)
+    index.rerank()
+    index.checked = (count, newest)
+
+
+async def refresh() -> None:
+    """Catch up with writes made by other processes."""
+    if _indexes is None:
+        return
+    async with async_session() as db:
+        for model, asset_type in ASSET_TYPES.items():
+            await _catch_up(db, model, _indexes[asset_type])
+    if any(index.garbage > max(len(index.docno), 1000) for index in _indexes.values()):
+        await build()
+
+
+async def run() -> None:
+    """Build the index, then refresh it every NGRAM_REFRESH_INTERVAL seconds."""
+    while True:
+        try:
+            if _indexes is None:
+                await build()
+            else:
+                await refresh()
+        except Exception as e:
+            logger.error(f"N-gram search index update failed: {e}")
+        await asyncio.sleep(settings.NGRAM_REFRESH_INTERVAL)
+
+
+def search(asset_type: str, text: str, limit: int = _MAX_RESULTS) -> list[int] | None:
+    """Ids of ``asset_type`` assets matching ``text``, best first; None until built."""
+    if _indexes is None:
+        return None
+    return _indexes[asset_type].search(text, limit)
+
+
+def suggest(text: str, limit: int, asset_type: str | None = None) -> list[tuple[str, int, str]] | None:
+    """``(asset type, id, name)`` of the best names completing ``text``; None until built."""
+    if _indexes is None:
+        return None
+    types = [asset_type] if asset_type else list(_indexes)
+    ranked = [
+        (rank, t, asset_id) for t in types for rank, asset_id in _indexes[t].suggest(text, limit)
+    ]
+    best = heapq.nlargest(limit, ranked, key=itemgetter(0))
+    return [(t, asset_id, _indexes[t].names[asset_id]) for _, t, asset_id in best]
+
+
+def stats() -> dict:
+    if _indexes is None:
+        return {"ready": False}
+    return {
+        "ready": True,
+        "build_seconds": _build_seconds,
+        **{
+            asset_type: {
+                "assets": len(index.docno),
+                "terms": len(index.title) + len(index.body),
+                "name_keys": len(index.name_keys),
+            }
+            for asset_type, index in _indexes.items()
+        },
+    }
+
+
+@event.listens_for(Session, "after_flush")
+def _collect(session: Session, flush_context) -> None:
+    if _indexes is None:
+        return
+    pending = session.info.setdefault("ngram_pending", {})
+    for obj in session.deleted:
+        if type(obj) in ASSET_TYPES:
+            pending[(ASSET_TYPES[type(obj)], obj.id)] = None
+    for obj in [*session.new, *session.dirty]:
+        asset_type = ASSET_TYPES.get(type(obj))
+        if asset_type is None:
+            continue
+        attrs = inspect(obj).attrs
+        if obj in session.new or any(attrs[a].history.has_changes() for a in (*_TEXT_ATTRS, "installs")):
+            pending[(asset_type, obj.id)] = obj
+
+
+@event.listens_for(Session, "after_commit")
+def _apply(session: Session) -> None:
+    pending = session.info.pop("ngram_pending", None)
+    if not pending or _indexes is None:
+        return
+    for (asset_type, asset_id), obj in pending.items():
+        index = _indexes[asset_type]
+        state = inspect(obj) if obj is not None else None
+        # Rows inserted in a rolled-back savepoint are no longer persistent
+        if state is None or not state.persistent:
+            index.remove(asset_id)
+            continue
+        # Read loaded values only; anything expired is left to the next refresh
+        loaded = state.dict
+        if all(k in loaded for k in _TEXT_ATTRS):
+            title, body = _fields(loaded["name"], loaded["description"], loaded["_tags"])
+            if index.fingerprints.get(asset_id) != _fingerprint(title, body):
+                index.add(asset_id, title, body)
+            index.name(asset_id, loaded["name"], loaded.get("installs", index.installs.get(asset_id, 0)))
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard(session: Session, previous_transaction) -> None:
+    if not previous_transaction.nested:
+        session.info.pop("ngram_pending", None)
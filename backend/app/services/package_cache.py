@@ -0,0 +1,180 @@
+"""Content-addressed cache of skill install packages.
+
+Packages are keyed by ``(git_url, commit_hash, skill_path)``, which fully
+determines their content. Each package is stored on disk as a gzipped tar of
+the skill directory, with an in-memory LRU of decoded text files in front.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import io
+import os
+import tarfile
+import tempfile
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from ..config import settings
+
+_EVICT_INTERVAL = 60  # seconds between disk-budget checks
+
+_memory: OrderedDict[str, tuple[int, dict[str, str]]] = OrderedDict()
+_memory_bytes = 0
+_last_evict = 0.0
+_stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+
+def package_key(git_url: str, commit_hash: str, skill_path: str) -> str:
+    return hashlib.sha256(f"{git_url}\0{commit_hash}\0{skill_path}".encode()).hexdigest()
+
+
+def archive_path(key: str) -> Path:
+    return Path(settings.PACKAGE_CACHE_DIR) / key[:2] / f"{key}.tar.gz"
+
+
+def _digest_path(path: Path) -> Path:
+    return path.with_name(path.name.removesuffix(".tar.gz") + ".sha256")
+
+
+def _remember(key: str, files: dict[str, str]) -> None:
+    global _memory_bytes
+    size = sum(len(name) + len(content) for name, content in files.items())
+    if key in _memory:
+        _memory_bytes -= _memory.pop(key)[0]
+    _memory[key] = (size, files)
+    _memory_bytes += size
+    budget = settings.PACKAGE_CACHE_MEMORY_MB * 1024 * 1024
+    while _memory_bytes > budget and len(_memory) > 1:
+        _memory_bytes -= _memory.popitem(last=False)[1][0]
+
+
+def _read_archive(path: Path) -> dict[str, str]:
+    files: dict[str, str] = {}
+    with tarfile.open(path, "r:gz") as tar:
+        for member in tar.getmembers():
+            if not member.isfile():
+                continue
+            try:
+                files[member.name] = tar.extractfile(member).read().decode("utf-8")
+            except UnicodeDecodeError:
+                pass  # Skip binary files
+    os.utime(path)  # mtime drives LRU eviction
+    return files
+
+
+def _write_archive(path: Path, skill_dir: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        # Fixed gzip and member mtimes keep archives byte-identical for identical content
+        with (
+            os.fdopen(fd, "wb") as fh,
+            gzip.GzipFile(fileobj=fh, mode="wb", mtime=0) as gz,
+            tarfile.open(fileobj=gz, mode="w") as tar,
+        ):
+            if skill_dir.is_dir():
+                for f in sorted(skill_dir.rglob("*")):
+                    rel = f.relative_to(skill_dir)
+                    if not f.is_file() or ".git" in rel.parts:
+                        continue
+                    data = f.read_bytes()
+                    info = tarfile.TarInfo(str(rel))
+                    info.size = len(data)
+                    info.mtime = 0
+                    tar.addfile(info, io.BytesIO(data))
+        _digest_path(path).write_text(_sha256(Path(tmp)))
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _archive_digest(path: Path) -> str:
+    """Return the archive's SHA-256, recorded in a sidecar file at write time."""
+    digest_file = _digest_path(path)
+    try:
+        return digest_file.read_text().strip()
+    except FileNotFoundError:
+        digest = _sha256(path)
+        digest_file.write_text(digest)
+        return digest
+
+
+def _evict_disk(root: Path) -> None:
+    """Delete least-recently-used archives until the store fits PACKAGE_CACHE_MAX_MB."""
+    archives = [(p.stat().st_mtime, p.stat().st_size, p) for p in root.glob("*/*.tar.gz")]
+    total = sum(size for _, size, _ in archives)
+    budget = settings.PACKAGE_CACHE_MAX_MB * 1024 * 1024
+    for _, size, path in sorted(archives):
+        if total <= budget:
+            break
+        path.unlink(missing_ok=True)
+        _digest_path(path).unlink(missing_ok=True)
+        total -= size
+
+
+async def get_files(key: str) -> dict[str, str] | None:
+    """Return cached package files, or None if the package has not been stored."""
+    entry = _memory.get(key)
+    if entry is not None:
+        _memory.move_to_end(key)
+        _stats["memory_hits"] += 1
+        return entry[1]
+
+    path = archive_path(key)
+    try:
+        files = await asyncio.to_thread(_read_archive, path)
+    except (FileNotFoundError, tarfile.TarError):
+        _stats["misses"] += 1
+        return None
+    _stats["disk_hits"] += 1
+    _remember(key, files)
+    return files
+
+
+async def open_archive(key: str) -> tuple[Path, str] | None:
+    """Return ``(archive_path, sha256)`` for a stored package, or None if absent."""
+    path = archive_path(key)
+    try:
+        digest = await asyncio.to_thread(_archive_digest, path)
+        os.utime(path)
+    except FileNotFoundError:
+        _stats["misses"] += 1
+        return None
+    _stats["disk_hits"] += 1
+    return path, digest
+
+
+async def store(key: str, skill_dir: Path) -> dict[str, str]:
+    """Archive ``skill_dir`` under ``key`` and return its text files."""
+    global _last_evict
+    path = archive_path(key)
+    await asyncio.to_thread(_write_archive, path, skill_dir)
+    files = await asyncio.to_thread(_read_archive, path)
+    _remember(key, files)
+
+    if time.monotonic() - _last_evict >= _EVICT_INTERVAL:
+        _last_evict = time.monotonic()
+        await asyncio.to_thread(_evict_disk, Path(settings.PACKAGE_CACHE_DIR))
+    return files
+
+
+def stats() -> dict:
+    lookups = sum(_stats.values())
+    hits = _stats["memory_hits"] + _stats["disk_hits"]
+    return {
+        **_stats,
+        "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        "memory_entries": len(_memory),
+        "memory_bytes": _memory_bytes,
+    }
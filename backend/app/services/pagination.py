@@ -0,0 +1,195 @@
+"""Page and cursor pagination shared by the list and search endpoints.
+
+Listings are ordered by a unique descending key, e.g. ``(installs, id)``.
+Cursor requests continue strictly after the last row of the previous page
+(keyset pagination), so deep pages cost the same as the first and rows do
+not shift or repeat when install counts change mid-scroll. ``page`` keeps
+working for existing clients.
+
+Cursors are opaque to clients: URL-safe base64 of a small JSON document.
+Relevance-ranked searches carry an offset instead, as ranks are computed per
+query and are no stable key.
+
+The total costs a second scan of the filtered rows. Callers can take an
+exact count, an approximate one (the last exact count for the same filter,
+reused for COUNT_CACHE_TTL seconds), or none at all and rely on ``has_more``.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Callable
+
+from sqlalchemy import DateTime, Select, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlalchemy.sql.elements import ColumnElement
+
+from ..cache import TTLCache
+from ..config import settings
+from skills_registry_shared.schemas.common import PaginatedResult
+
+
+TOTAL_MODES = ("exact", "approx", "none")
+_ID_CHUNK = 500  # stay well below SQLite's bound-parameter limit
+
+_count_cache = TTLCache(maxsize=settings.COUNT_CACHE_SIZE, ttl=settings.COUNT_CACHE_TTL)
+
+
+def encode_cursor(position: dict) -> str:
+    raw = json.dumps(position, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position = json.loads(raw)
+    except (binascii.Error, ValueError):
+        position = None
+    if not isinstance(position, dict):
+        from fastapi import HTTPException
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    return position
+
+
+def _after(keys: list[InstrumentedAttribute], values: list) -> ColumnElement:
+    """Rows strictly after ``values`` in descending ``keys`` order."""
+    if not isinstance(values, list) or len(values) != len(keys):
+        from fastapi import HTTPException
+        raise HTTPException(status_code=400, detail="Cursor does not match this listing.")
+    bound = [
+        datetime.fromisoformat(v) if isinstance(k.type, DateTime) and isinstance(v, str) else v
+        for k, v in zip(keys, values)
+    ]
+    return tuple_(*keys) < tuple_(*bound)
+
+
+async def _count(db: AsyncSession, count_query: Select, mode: str) -> int | None:
+    if mode == "none":
+        return None
+    compiled = count_query.compile()
+    key = (str(compiled), repr(sorted(compiled.params.items())))
+    if mode == "approx":
+        cached = _count_cache.get(key)
+        if cached is not None:
+            return cached
+    result = await db.execute(count_query)
+    count = result.scalar() or 0
+    _count_cache.set(key, count)
+    return count
+
+
+def count_cache_stats() -> dict:
+    return _count_cache.stats()
+
+
+def _offset_of(cursor: str) -> int:
+    position = decode_cursor(cursor)
+    if not isinstance(position.get("offset"), int) or position["offset"] < 0:
+        from fastapi import HTTPException
+        raise HTTPException(status_code=400, detail="Cursor does not match this listing.")
+    return position["offset"]
+
+
+async def fetch_page(
+    db: AsyncSession,
+    query: Select,
+    count_query: Select,
+    keys: list[InstrumentedAttribute],
+    convert: Callable[[Any], Any],
+    rank: ColumnElement | None = None,
+    page: int = 1,
+    size: int = 20,
+    cursor: str | None = None,
+    total: str = "exact",
+) -> PaginatedResult:
+    """Run ``query`` for one page, ordered by ``rank`` (if any) then ``keys`` descending.
+
+    ``cursor`` (a previous ``next_cursor``) takes precedence over ``page``.
+    ``total`` is one of TOTAL_MODES; with "none", ``total`` and ``pages`` are None.
+    """
+    offset = (page - 1) * size
+    if cursor is not None:
+        position = decode_cursor(cursor)
+        if rank is None and "after" in position:
+            query = query.where(_after(keys, position["after"]))
+            offset = 0
+        elif rank is not None:
+            offset = _offset_of(cursor)
+            page = offset // size + 1
+        else:
+            from fastapi import HTTPException
+            raise HTTPException(status_code=400, detail="Cursor does not match this listing.")
+
+    count = await _count(db, count_query, total)
+
+    order = [k.desc() for k in keys]
+    if rank is not None:
+        order.insert(0, rank)
+    # One extra row tells whether there is a next page
+    result = await db.execute(query.order_by(*order).offset(offset).limit(size + 1))
+    rows = result.scalars().all()
+
+    next_cursor = None
+    has_more = len(rows) > size
+    if has_more:
+        rows = rows[:size]
+        if rank is not None:
+            next_cursor = encode_cursor({"offset": offset + size})
+        else:
+            next_cursor = encode_cursor({"after": [getattr(rows[-1], k.key) for k in keys]})
+
+    pages = None
+    if count is not None:
+        # A cached count may be stale; never report fewer rows than were seen
+        count = max(count, offset + len(rows) + has_more)
+        pages = (count + size - 1) // size if count > 0 else 0
+    return PaginatedResult(
+        items=[convert(r) for r in rows], total=count, page=page, size=size, pages=pages,
+        has_more=has_more, next_cursor=next_cursor,
+    )
+
+
+async def fetch_ranked(
+    db: AsyncSession,
+    model,
+    ids: list[int],
+    convert: Callable[[Any], Any],
+    where: ColumnElement | None = None,
+    page: int = 1,
+    size: int = 20,
+    cursor: str | None = None,
+    total: str = "exact",
+) -> PaginatedResult:
+    """Page through ``ids`` of ``model``, already in rank order, loading only the rows shown.
+
+    ``where`` further restricts the ids, e.g. to a tag filter. The matches are
+    known up front, so the total is exact at no cost.
+    """
+    offset = (page - 1) * size
+    if cursor is not None:
+        offset = _offset_of(cursor)
+        page = offset // size + 1
+
+    if where is not None:
+        allowed: set[int] = set()
+        for i in range(0, len(ids), _ID_CHUNK):
+            result = await db.execute(select(model.id).where(model.id.in_(ids[i:i + _ID_CHUNK]), where))
+            allowed.update(result.scalars())
+        ids = [i for i in ids if i in allowed]
+
+    shown = ids[offset:offset + size]
+    result = await db.execute(select(model).where(model.id.in_(shown)))
+    rows = {row.id: row for row in result.scalars()}
+    has_more = offset + size < len(ids)
+
+    count = pages = None
+    if total != "none":
+        count = len(ids)
+        pages = (count + size - 1) // size if count > 0 else 0
+    return PaginatedResult(
+        items=[convert(rows[i]) for i in shown if i in rows], total=count, page=page, size=size, pages=pages,
+        has_more=has_more, next_cursor=encode_cursor({"offset": offset + size}) if has_more else None,
+    )
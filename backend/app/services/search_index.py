@@ -0,0 +1,135 @@
+"""Full-text search index over skills, MCP servers and agent configs.
+
+SQLite uses FTS5 external-content tables kept in sync by triggers;
+PostgreSQL uses a generated, weighted ``tsvector`` column with a GIN index.
+Both follow every write to the base tables without any application code.
+Other databases (or SQLite builds without FTS5) fall back to LIKE.
+
+Both tokenizers treat a run of Chinese, Japanese or Korean text as a single
+word, so a CJK query word would only ever match the whole run. Such words are
+matched with LIKE instead, as before the index existed.
+"""
+
+import logging
+import re
+
+from sqlalchemy import Select, column, func, literal_column, table, text
+from sqlalchemy.sql.elements import ColumnElement
+
+logger = logging.getLogger(__name__)
+
+# Indexed columns per table, most important first; weights follow the same order
+INDEXED_COLUMNS = {
+    "skills": ["name", "description", "tags", "readme_content"],
+    "mcp_servers": ["name", "description", "tags"],
+    "agent_configs": ["name", "description", "tags", "prompt"],
+}
+_BM25_WEIGHTS = [10.0, 4.0, 4.0, 1.0]
+_TS_WEIGHTS = ["A", "B", "B", "D"]
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]")
+
+_backend: str | None = None  # "fts5" | "tsvector" | None (LIKE fallback)
+
+
+def _install_fts5(conn) -> None:
+    for name, cols in INDEXED_COLUMNS.items():
+        fts = f"{name}_fts"
+        exists = conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :n"), {"n": fts}
+        ).first()
+        col_list = ", ".join(cols)
+        new_list = ", ".join(f"new.{c}" for c in cols)
+        old_list = ", ".join(f"old.{c}" for c in cols)
+        conn.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+            f"{col_list}, content='{name}', content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {name} BEGIN "
+            f"INSERT INTO {fts}(rowid, {col_list}) VALUES (new.id, {new_list}); END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {name} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {col_list}) VALUES ('delete', old.id, {old_list}); END"
+        ))
+        # Only indexed columns fire this, so install counters never touch the index
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {col_list} ON {name} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {col_list}) VALUES ('delete', old.id, {old_list}); "
+            f"INSERT INTO {fts}(rowid, {col_list}) VALUES (new.id, {new_list}); END"
+        ))
+        if not exists:
+            conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+            logger.info(f"Built full-text index {fts}.")
+
+
+def _install_tsvector(conn) -> None:
+    for name, cols in INDEXED_COLUMNS.items():
+        vector = " || ".join(
+            f"setweight(to_tsvector('simple', coalesce({c}, '')), '{w}')" for c, w in zip(cols, _TS_WEIGHTS)
+        )
+        conn.execute(text(
+            f"ALTER TABLE {name} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            f"GENERATED ALWAYS AS ({vector}) STORED"
+        ))
+        conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_{name}_search_vector ON {name} USING GIN (search_vector)"
+        ))
+
+
+def install(conn) -> None:
+    """Create the full-text index for the connected database, if it supports one."""
+    global _backend
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        try:
+            _install_fts5(conn)
+            _backend = "fts5"
+        except Exception as e:
+            logger.warning(f"SQLite FTS5 unavailable, keyword search falls back to LIKE: {e}")
+    elif dialect == "postgresql":
+        _install_tsvector(conn)
+        _backend = "tsvector"
+
+
+def _tokens(keyword: str) -> list[str]:
+    return _TOKEN_RE.findall(keyword.lower())
+
+
+def apply(query: Select, model, keyword: str) -> tuple[Select, ColumnElement | None]:
+    """Filter ``query`` on ``model`` to rows matching ``keyword``.
+
+    Every word must match; the last one may be a prefix, as the user may still
+    be typing it. Returns the query and an ORDER BY clause that puts the most
+    relevant rows first, or None when there is no index to rank with.
+    """
+    name = model.__tablename__
+    tokens = _tokens(keyword)
+
+    if _backend is not None and tokens:
+        cjk = [t for t in tokens if _CJK_RE.search(t)]
+        for t in cjk:
+            kw = f"%{t}%"
+            query = query.where(func.lower(model.name).like(kw) | func.lower(model.description).like(kw))
+        tokens = [t for t in tokens if t not in cjk]
+        if cjk and not tokens:
+            return query, None
+
+    if _backend == "fts5" and tokens:
+        fts = table(f"{name}_fts", column("rowid"))
+        # Quoted, so user input is never parsed as FTS5 query syntax
+        match = " ".join(f'"{t}"' for t in tokens) + "*"
+        query = query.join(fts, fts.c.rowid == model.id).where(literal_column(f"{name}_fts").op("MATCH")(match))
+        weights = _BM25_WEIGHTS[:len(INDEXED_COLUMNS[name])]
+        return query, func.bm25(literal_column(f"{name}_fts"), *weights).asc()
+
+    if _backend == "tsvector" and tokens:
+        vector = literal_column(f"{name}.search_vector")
+        tsquery = func.to_tsquery("simple", " & ".join(tokens) + ":*")
+        return query.where(vector.op("@@")(tsquery)), func.ts_rank(vector, tsquery).desc()
+
+    kw = f"%{keyword.lower()}%"
+    return query.where(func.lower(model.name).like(kw) | func.lower(model.description).like(kw)), None
+
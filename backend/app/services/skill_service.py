@@ -1,17 +1,28 @@
 """Skill business logic."""
 
 import json
+from pathlib import Path
+
 import markdown
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..cache import SingleFlight, TTLCache
+from ..config import settings
 from ..models.skill import Skill
 from ..models.install_log import InstallLog
 from skills_registry_shared.schemas.skill import SkillCreate, SkillResponse, SkillInstallPackage
 from skills_registry_shared.schemas.user import UserBrief
 from skills_registry_shared.schemas.common import PaginatedResult
 from skills_registry_shared.parsers import parse_skill_md
-from . import git_service
+from . import git_service, ngram_index, package_cache, pagination, search_index, tag_index
+
+
+# Concurrent installs of the same package share one clone
+install_flights = SingleFlight()
+# Registered package key -> commit packaged instead, when the registered commit could not be
+# fetched; short-lived, since the ref it fell back to may move
+package_aliases = TTLCache(maxsize=1024, ttl=settings.PACKAGE_ALIAS_TTL)
 
 
 def _to_response(s: Skill) -> SkillResponse:
@@ -78,36 +89,37 @@ async def get_by_id(db: AsyncSession, skill_id: int) -> SkillResponse | None:
 async def search(
     db: AsyncSession,
     keyword: str | None = None,
-    tag: str | None = None,
+    tags: list[str] | None = None,
+    tag_match: str = "all",
     page: int = 1,
     size: int = 20,
+    cursor: str | None = None,
+    total: str = "exact",
+    fuzzy: bool = False,
 ) -> PaginatedResult[SkillResponse]:
     query = select(Skill)
     count_query = select(func.count(Skill.id))
 
+    filt = tag_index.filter_clause(Skill, tags, tag_match) if tags else None
+    if keyword and fuzzy:
+        ids = ngram_index.search("skill", keyword)
+        if ids is not None:
+            return await pagination.fetch_ranked(
+                db, Skill, ids, _to_response, where=filt, page=page, size=size, cursor=cursor, total=total
+            )
+
+    rank = None
     if keyword:
-        kw = f"%{keyword.lower()}%"
-        filt = func.lower(Skill.name).like(kw) | func.lower(Skill.description).like(kw)
+        query, rank = search_index.apply(query, Skill, keyword)
+        count_query, _ = search_index.apply(count_query, Skill, keyword)
+    if filt is not None:
         query = query.where(filt)
         count_query = count_query.where(filt)
 
-    # Tag filtering via JSON string — application-level
-    total_result = await db.execute(count_query)
-    total = total_result.scalar() or 0
-
-    query = query.order_by(Skill.installs.desc()).offset((page - 1) * size).limit(size)
-    result = await db.execute(query)
-    skills = result.scalars().all()
-
-    # Filter by tag in application layer if needed
-    if tag:
-        skills = [s for s in skills if tag in s.tags]
-        total = len(skills)
-
-    items = [_to_response(s) for s in skills]
-    pages = (total + size - 1) // size if total > 0 else 0
-
-    return PaginatedResult(items=items, total=total, page=page, size=size, pages=pages)
+    return await pagination.fetch_page(
+        db, query, count_query, [Skill.installs, Skill.id], _to_response,
+        rank=rank, page=page, size=size, cursor=cursor, total=total,
+    )
 
 
 async def list_top(db: AsyncSession, limit: int = 10) -> list[SkillResponse]:
@@ -117,38 +129,84 @@ async def list_top(db: AsyncSession, limit: int = 10) -> list[SkillResponse]:
     return [_to_response(s) for s in result.scalars().all()]
 
 
-async def get_install_package(db: AsyncSession, skill_id: int) -> SkillInstallPackage:
+async def _get_skill_or_404(db: AsyncSession, skill_id: int) -> Skill:
     result = await db.execute(select(Skill).where(Skill.id == skill_id))
     skill = result.scalar_one_or_none()
     if not skill:
         from fastapi import HTTPException
         raise HTTPException(status_code=404, detail="Skill not found")
+    return skill
 
-    # Clone repo and read files
-    repo_dir = await git_service.clone_shallow(skill.git_url, skill.git_ref)
-    try:
-        skill_dir = repo_dir / skill.skill_path
-        files: dict[str, str] = {}
-        if skill_dir.is_dir():
-            for f in skill_dir.rglob("*"):
-                if f.is_file():
-                    rel = str(f.relative_to(skill_dir))
-                    try:
-                        files[rel] = f.read_text(encoding="utf-8")
-                    except UnicodeDecodeError:
-                        pass  # Skip binary files
-    finally:
-        git_service.cleanup(repo_dir)
+
+async def _populate_package(skill: Skill, key: str) -> tuple[str, dict[str, str]]:
+    """Clone the skill directory into the package cache.
+
+    Returns the commit actually packaged and its text files. That is the
+    registered commit unless the server refuses to serve it by id; then the
+    skill's ref is checked out and the package is keyed by whatever it
+    resolves to, so a moved branch never lands under the old commit's key.
+    ``package_aliases`` then points ``key`` at that commit for a while, so
+    repeat installs do not clone again.
+    """
+    git_url, git_ref, commit_hash, skill_path = skill.git_url, skill.git_ref, skill.commit_hash, skill.skill_path
+    sparse = git_service.sparse_dir(skill_path)
+
+    async def clone_and_store() -> tuple[str, dict[str, str]]:
+        try:
+            repo_dir = await git_service.clone_shallow(git_url, commit_hash, sparse=sparse)
+        except git_service.GitError:
+            repo_dir = await git_service.clone_shallow(git_url, git_ref, sparse=sparse)
+        try:
+            checked_out = await git_service.get_commit_hash(repo_dir)
+            if checked_out == commit_hash:
+                return checked_out, await package_cache.store(key, repo_dir / skill_path)
+            fallback_key = package_cache.package_key(git_url, checked_out, skill_path)
+            files = await package_cache.store(fallback_key, repo_dir / skill_path)
+            package_aliases.set(key, checked_out)
+            return checked_out, files
+        finally:
+            git_service.cleanup(repo_dir)
+
+    return await install_flights.do(key, clone_and_store)
+
+
+def _package_key(skill: Skill, commit_hash: str) -> str:
+    return package_cache.package_key(skill.git_url, commit_hash, skill.skill_path)
+
+
+async def get_install_package(db: AsyncSession, skill_id: int) -> SkillInstallPackage:
+    skill = await _get_skill_or_404(db, skill_id)
+
+    # Served from the package cache; only the first install of a commit clones
+    key = _package_key(skill, skill.commit_hash)
+    commit_hash = package_aliases.get(key) or skill.commit_hash
+    files = await package_cache.get_files(_package_key(skill, commit_hash))
+    if files is None:
+        commit_hash, files = await _populate_package(skill, key)
 
     return SkillInstallPackage(
         name=skill.name,
         git_url=skill.git_url,
-        commit_hash=skill.commit_hash,
+        commit_hash=commit_hash,
         skill_path=skill.skill_path,
         files=files,
     )
 
 
+async def get_install_archive(db: AsyncSession, skill_id: int) -> tuple[str, Path, str]:
+    """Return ``(skill_name, archive_path, sha256)`` of the skill's .tar.gz package."""
+    skill = await _get_skill_or_404(db, skill_id)
+
+    key = _package_key(skill, skill.commit_hash)
+    commit_hash = package_aliases.get(key) or skill.commit_hash
+    archive = await package_cache.open_archive(_package_key(skill, commit_hash))
+    if archive is None:
+        commit_hash, _ = await _populate_package(skill, key)
+        archive = await package_cache.open_archive(_package_key(skill, commit_hash))
+    path, digest = archive
+    return skill.name, path, digest
+
+
 async def record_install(db: AsyncSession, skill_id: int, user_id: int, agent_type: str = "kiro") -> None:
     # Increment counter
     result = await db.execute(select(Skill).where(Skill.id == skill_id))
@@ -0,0 +1,131 @@
+"""Background sync of sync sources, each on its own interval.
+
+Due sources run concurrently up to SYNC_MAX_CONCURRENT, each in its own
+session and under SYNC_TIMEOUT, so one slow or hanging remote does not hold
+back the rest. Failures retry with jittered exponential backoff, capped at
+the source's own interval.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+
+from ..config import settings
+from ..database import async_session
+from ..models.sync_source import SyncSource
+from ..models.user import User
+from . import import_service
+
+logger = logging.getLogger(__name__)
+
+_JITTER = 0.1  # +/- fraction applied to every delay, to spread sources out
+_RETRY_BASE = 60  # seconds before the first retry after a failure
+
+_running: dict[int, asyncio.Task] = {}
+
+
+def _utc(dt: datetime | None) -> datetime | None:
+    """SQLite drops tzinfo; stored datetimes are always UTC."""
+    return dt.replace(tzinfo=timezone.utc) if dt is not None and dt.tzinfo is None else dt
+
+
+def _jittered(seconds: float) -> timedelta:
+    return timedelta(seconds=seconds * random.uniform(1 - _JITTER, 1 + _JITTER))
+
+
+def next_delay(source: SyncSource) -> timedelta:
+    """Time until the next run: the source's interval, or a backoff after failures."""
+    if source.consecutive_failures:
+        backoff = _RETRY_BASE * 2 ** (source.consecutive_failures - 1)
+        return _jittered(min(backoff, source.sync_interval))
+    return _jittered(source.sync_interval)
+
+
+def _is_due(source: SyncSource, now: datetime) -> bool:
+    due_at = _utc(source.next_sync_at)
+    if due_at is None and source.last_synced_at is not None:
+        due_at = _utc(source.last_synced_at) + timedelta(seconds=source.sync_interval)
+    return due_at is None or due_at <= now
+
+
+async def _run_source(source_id: int, slots: asyncio.Semaphore) -> None:
+    async with slots, async_session() as db:
+        source = await db.get(SyncSource, source_id)
+        admin_result = await db.execute(select(User.id).where(User.role == "admin").order_by(User.id).limit(1))
+        admin_id = admin_result.scalar_one_or_none()
+        if source is None or not source.is_active:
+            return
+        if admin_id is None:
+            logger.warning(f"Sync of '{source.git_url}' skipped: no admin user found.")
+            return
+
+        git_url = source.git_url
+        started = time.monotonic()
+        try:
+            synced = await asyncio.wait_for(
+                import_service.sync_source(db, source, admin_id=admin_id), timeout=settings.SYNC_TIMEOUT
+            )
+        except Exception as e:
+            await db.rollback()
+            await db.refresh(source)
+            error = f"timed out after {settings.SYNC_TIMEOUT}s" if isinstance(e, asyncio.TimeoutError) else str(e)
+            source.consecutive_failures += 1
+            source.last_status = "error"
+            source.last_error = error[:2000]
+            logger.error(f"Sync failed for '{git_url}' ({source.consecutive_failures} in a row): {error}")
+        else:
+            source.consecutive_failures = 0
+            source.last_status = "unchanged" if synced is None else "ok"
+            source.last_error = None
+            if synced is None:
+                logger.info(f"Synced '{git_url}': unchanged, skipped.")
+            else:
+                logger.info(
+                    f"Synced '{git_url}': {len(synced.added)} added, "
+                    f"{len(synced.updated)} updated, {synced.unchanged} unchanged."
+                )
+
+        source.last_duration = round(time.monotonic() - started, 3)
+        source.next_sync_at = datetime.now(timezone.utc) + next_delay(source)
+        await db.commit()
+
+
+def _finished(source_id: int, task: asyncio.Task) -> None:
+    _running.pop(source_id, None)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Sync of source {source_id} crashed: {task.exception()!r}")
+
+
+async def run() -> None:
+    """Start due sources every SYNC_POLL_INTERVAL seconds, forever."""
+    slots = asyncio.Semaphore(settings.SYNC_MAX_CONCURRENT)
+    try:
+        while True:
+            try:
+                async with async_session() as db:
+                    result = await db.execute(
+                        select(SyncSource).where(SyncSource.is_active == True)  # noqa: E712
+                    )
+                    now = datetime.now(timezone.utc)
+                    due = [s.id for s in result.scalars() if s.id not in _running and _is_due(s, now)]
+            except Exception as e:
+                logger.error(f"Background sync: could not load sources: {e}")
+                due = []
+
+            for source_id in due:
+                task = asyncio.create_task(_run_source(source_id, slots))
+                _running[source_id] = task
+                task.add_done_callback(lambda t, sid=source_id: _finished(sid, t))
+            await asyncio.sleep(settings.SYNC_POLL_INTERVAL)
+    finally:
+        for task in list(_running.values()):
+            task.cancel()
+
+
+def stats() -> dict:
+    # Started sources, including those waiting for one of the concurrency slots
+    return {"max_concurrent": settings.SYNC_MAX_CONCURRENT, "in_progress": len(_running)}
@@ -0,0 +1,90 @@
+"""Normalized tag index for skills, MCP servers and agent configs.
+
+Assets keep their tags as a JSON list (``_tags``) for display; the
+``asset_tags`` table mirrors them one row per tag so tag filters run in SQL,
+before pagination. The mirror is maintained on every ORM flush, so any code
+path that sets ``.tags`` or deletes an asset keeps it current.
+"""
+
+import json
+import logging
+
+from sqlalchemy import delete, distinct, event, func, insert, inspect, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+
+from ..models.agent_config import AgentConfig
+from ..models.asset_tag import AssetTag
+from ..models.mcp_server import MCPServer
+from ..models.skill import Skill
+
+logger = logging.getLogger(__name__)
+
+ASSET_TYPES = {Skill: "skill", MCPServer: "mcp", AgentConfig: "agent"}
+_MAX_TAG_LEN = 128
+
+
+def _rows(asset_type: str, asset_id: int, tags: list) -> list[dict]:
+    unique = {t for t in tags if isinstance(t, str) and 0 < len(t) <= _MAX_TAG_LEN}
+    return [{"asset_type": asset_type, "asset_id": asset_id, "tag": t} for t in sorted(unique)]
+
+
+@event.listens_for(Session, "after_flush")
+def _sync_tags(session: Session, flush_context) -> None:
+    """Mirror tag changes of flushed assets into asset_tags, in the same transaction."""
+    stale: dict[str, list[int]] = {}
+    rows: list[dict] = []
+    for obj in [*session.new, *session.dirty, *session.deleted]:
+        asset_type = ASSET_TYPES.get(type(obj))
+        if asset_type is None:
+            continue
+        if obj in session.deleted:
+            stale.setdefault(asset_type, []).append(obj.id)
+        elif obj in session.new or inspect(obj).attrs._tags.history.has_changes():
+            stale.setdefault(asset_type, []).append(obj.id)
+            rows.extend(_rows(asset_type, obj.id, obj.tags))
+
+    if not stale:
+        return
+    conn = session.connection()
+    for asset_type, ids in stale.items():
+        conn.execute(delete(AssetTag).where(AssetTag.asset_type == asset_type, AssetTag.asset_id.in_(ids)))
+    if rows:
+        conn.execute(insert(AssetTag), rows)
+
+
+def backfill(conn) -> None:
+    """Populate asset_tags from the JSON tag columns when the table is new."""
+    if conn.execute(select(AssetTag.asset_id).limit(1)).first() is not None:
+        return
+    total = 0
+    for model, asset_type in ASSET_TYPES.items():
+        rows = []
+        for asset_id, raw in conn.execute(select(model.id, model._tags).where(model._tags != "[]")):
+            try:
+                tags = json.loads(raw) if raw else []
+            except ValueError:
+                continue
+            rows.extend(_rows(asset_type, asset_id, tags if isinstance(tags, list) else []))
+        if rows:
+            conn.execute(insert(AssetTag), rows)
+            total += len(rows)
+    if total:
+        logger.info(f"Indexed {total} existing asset tags.")
+
+
+def parse_tags(values: list[str] | None) -> list[str]:
+    """Flatten ``?tag=a&tag=b,c`` into ``["a", "b", "c"]``, dropping blanks."""
+    tags = []
+    for value in values or []:
+        tags.extend(t.strip() for t in value.split(","))
+    return [t for t in dict.fromkeys(tags) if t]
+
+
+def filter_clause(model, tags: list[str], match: str = "all") -> ColumnElement:
+    """WHERE clause keeping ``model`` rows tagged with all (or any) of ``tags``."""
+    asset_type = ASSET_TYPES[model]
+    tagged = select(AssetTag.asset_id).where(AssetTag.asset_type == asset_type, AssetTag.tag.in_(tags))
+    if match == "all" and len(tags) > 1:
+        tagged = tagged.group_by(AssetTag.asset_id).having(func.count(distinct(AssetTag.tag)) == len(tags))
+    return model.id.in_(tagged)
@@ -4,9 +4,13 @@ from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..models.user import User
-from ..auth import generate_api_key, hash_api_key, hash_password, verify_password, create_jwt_token
+from ..auth import (
+    api_key_prefix, generate_api_key, hash_api_key, hash_password, verify_password, create_jwt_token,
+    invalidate_credentials, note_token_epoch,
+)
 from skills_registry_shared.schemas.user import UserResponse, APIKeyResponse, AuthResponse, PublishStats
 from skills_registry_shared.schemas.common import PaginatedResult
+from . import pagination
 
 
 def _to_response(u: User) -> UserResponse:
@@ -47,21 +51,20 @@ async def regenerate_api_key(db: AsyncSession, user_id: int) -> APIKeyResponse:
         raise HTTPException(status_code=404, detail="User not found")
 
     key = generate_api_key()
-    user.api_key_hash = hash_api_key(key)
+    user.api_key_hash = await hash_api_key(key)
+    user.api_key_prefix = api_key_prefix(key)
     await db.commit()
+    invalidate_credentials(user_id)
     return APIKeyResponse(api_key=key)
 
 
-async def list_users(db: AsyncSession, page: int = 1, size: int = 20) -> PaginatedResult[UserResponse]:
-    total_result = await db.execute(select(func.count(User.id)))
-    total = total_result.scalar() or 0
-
-    result = await db.execute(
-        select(User).order_by(User.created_at.desc()).offset((page - 1) * size).limit(size)
+async def list_users(
+    db: AsyncSession, page: int = 1, size: int = 20, cursor: str | None = None, total: str = "exact"
+) -> PaginatedResult[UserResponse]:
+    return await pagination.fetch_page(
+        db, select(User), select(func.count(User.id)), [User.created_at, User.id], _to_response,
+        page=page, size=size, cursor=cursor, total=total,
     )
-    items = [_to_response(u) for u in result.scalars().all()]
-    pages = (total + size - 1) // size if total > 0 else 0
-    return PaginatedResult(items=items, total=total, page=page, size=size, pages=pages)
 
 
 async def update_role(db: AsyncSession, user_id: int, role: str) -> UserResponse:
@@ -71,8 +74,11 @@ async def update_role(db: AsyncSession, user_id: int, role: str) -> UserResponse
         from fastapi import HTTPException
         raise HTTPException(status_code=404, detail="User not found")
     user.role = role
+    user.token_epoch += 1
     await db.commit()
+    invalidate_credentials(user_id)
     await db.refresh(user)
+    note_token_epoch(user)
     return _to_response(user)
 
 
@@ -81,7 +87,10 @@ async def disable(db: AsyncSession, user_id: int) -> None:
     user = result.scalar_one_or_none()
     if user:
         user.is_active = False
+        user.token_epoch += 1
         await db.commit()
+        invalidate_credentials(user_id)
+        note_token_epoch(user)
 
 
 async def register_with_password(
@@ -104,13 +113,14 @@ async def register_with_password(
         username=username,
         email=email,
         role="user",
-        password_hash=hash_password(password),
-        api_key_hash=hash_api_key(key),
+        password_hash=await hash_password(password),
+        api_key_hash=await hash_api_key(key),
+        api_key_prefix=api_key_prefix(key),
     )
     db.add(user)
     await db.commit()
     await db.refresh(user)
-    token = create_jwt_token(user.id)
+    token = create_jwt_token(user)
     return AuthResponse(
         user=_to_response(user),
         api_key=key,
@@ -130,11 +140,11 @@ async def login_with_password(db: AsyncSession, email: str, password: str) -> Au
     if not user.is_active:
         raise HTTPException(status_code=403, detail="Account is disabled.")
 
-    if not verify_password(password, user.password_hash):
+    if not await verify_password(password, user.password_hash):
         raise HTTPException(status_code=401, detail="Invalid email or password.")
 
     # Return JWT token for frontend session — API key is NOT touched.
-    token = create_jwt_token(user.id)
+    token = create_jwt_token(user)
     return AuthResponse(user=_to_response(user), token=token)
 
 
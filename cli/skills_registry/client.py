@@ -1,9 +1,42 @@
 """HTTP client for Skills Registry API."""
 
+import io
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator
+
 import httpx
 from .config import get_registry_url, get_api_key
 
 
+_ARCHIVE_TYPES = ("application/gzip", "application/x-gzip")
+
+
+class ArchiveUnavailable(RuntimeError):
+    """The registry answered the archive request with something other than an archive."""
+
+
+class _ResponseStream(io.RawIOBase):
+    """Read-only file object over a streaming httpx response body."""
+
+    def __init__(self, resp: httpx.Response):
+        self._chunks = resp.iter_bytes()
+        self._buffer = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self._buffer:
+            try:
+                self._buffer = next(self._chunks)
+            except StopIteration:
+                return 0
+        n = min(len(b), len(self._buffer))
+        b[:n] = self._buffer[:n]
+        self._buffer = self._buffer[n:]
+        return n
+
+
 class RegistryClient:
     def __init__(self):
         self._client = httpx.Client(
@@ -30,6 +63,19 @@ class RegistryClient:
     def get_skill_install(self, skill_id: int) -> dict:
         return self._handle(self._client.get(f"/api/v1/skills/{skill_id}/install"))
 
+    @contextmanager
+    def stream_skill_archive(self, skill_id: int) -> Iterator[BinaryIO]:
+        """Yield the skill's .tar.gz package as a file object read straight off the wire."""
+        with self._client.stream("GET", f"/api/v1/skills/{skill_id}/archive") as resp:
+            if not resp.is_success:
+                resp.read()
+                self._handle(resp)
+            # Older registries that serve the web app answer unknown paths with index.html
+            content_type = resp.headers.get("content-type", "").split(";")[0].strip()
+            if content_type not in _ARCHIVE_TYPES:
+                raise ArchiveUnavailable(f"Registry returned {content_type or 'no content type'} instead of an archive")
+            yield io.BufferedReader(_ResponseStream(resp))
+
     def create_skill(self, data: dict) -> dict:
         return self._handle(self._client.post("/api/v1/skills", json=data))
 
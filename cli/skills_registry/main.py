@@ -9,7 +9,7 @@ import typer
 from rich.console import Console
 from rich.table import Table
 
-from .client import RegistryClient
+from .client import ArchiveUnavailable, RegistryClient
 from .config import set_config, get_config, get_registry_url
 from skills_registry_shared.parsers import parse_skill_md_file
 from skills_registry_shared.adapters import AdapterFactory, Scope, InstallMethod
@@ -128,15 +128,21 @@ def add(name: str, agent: str = "kiro", method: str = "copy", scope: str = "work
             raise typer.Exit(1)
 
         skill = items[0]
-        package = client.get_skill_install(skill["id"])
-
         adapter = AdapterFactory.get_adapter(agent)
         s = Scope(scope)
         m = InstallMethod(method)
-        path = adapter.install_skill(package["files"], package["name"], s, m)
+        try:
+            with client.stream_skill_archive(skill["id"]) as archive:
+                path = adapter.install_skill_archive(archive, skill["name"], s, m)
+        except RuntimeError as e:
+            if not isinstance(e, ArchiveUnavailable) and "API error (404)" not in str(e):
+                raise
+            # Older registry without the archive endpoint
+            package = client.get_skill_install(skill["id"])
+            path = adapter.install_skill(package["files"], package["name"], s, m)
 
         client.record_skill_install(skill["id"], agent_type=agent)
-        console.print(f"✓ Installed [bold]{package['name']}[/bold] → {path}")
+        console.print(f"✓ Installed [bold]{skill['name']}[/bold] → {path}")
         console.print(adapter.get_post_install_hints())
     except typer.Exit:
         raise
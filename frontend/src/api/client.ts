@@ -51,9 +51,16 @@ export const searchAll = (q?: string, type?: string, page = 1) => {
   if (q) params.set('q', q)
   if (type) params.set('type', type)
   params.set('page', String(page))
+  params.set('total', 'none') // results page shows no counts
   return request(`/search?${params.toString()}`)
 }
 
+export const suggestSearch = (q: string, type?: string) => {
+  const params = new URLSearchParams({ q })
+  if (type) params.set('type', type)
+  return request(`/search/suggest?${params.toString()}`)
+}
+
 // Profile
 export const getMyPublished = () => request('/users/me/published')
 export const getMyInstalled = () => request('/users/me/installed')
@@ -80,3 +87,4 @@ export const triggerSync = (id: number) =>
   request(`/admin/sync-sources/${id}/sync`, { method: 'POST' })
 export const adminImport = (git_url: string) =>
   request('/admin/import', { method: 'POST', body: JSON.stringify({ git_url }) })
+export const getImportJob = (id: number) => request(`/admin/jobs/${id}`)
@@ -1,6 +1,6 @@
 import { useEffect, useState } from 'react'
 import { useSearchParams } from 'react-router-dom'
-import { searchAll } from '../api/client'
+import { searchAll, suggestSearch } from '../api/client'
 import AssetCard from '../components/AssetCard'
 
 const TYPES = [
@@ -20,12 +20,25 @@ export default function SearchPage() {
   const q = params.get('q') || ''
   const type = params.get('type') || ''
   const [query, setQuery] = useState(q)
+  const [suggestions, setSuggestions] = useState<{ id: number; name: string; type: string }[]>([])
   const [results, setResults] = useState<{ skills?: { items: Asset[] }; mcps?: { items: Asset[] }; agents?: { items: Asset[] } }>({})
 
   useEffect(() => {
     searchAll(q, type || undefined).then((d) => setResults(d as typeof results)).catch(() => {})
   }, [q, type])
 
+  // Only names are fetched while typing; the full search runs on submit
+  useEffect(() => {
+    if (!query.trim() || query === q) {
+      setSuggestions([])
+      return
+    }
+    const timer = setTimeout(() => {
+      suggestSearch(query, type || undefined).then((d) => setSuggestions(d as typeof suggestions)).catch(() => {})
+    }, 150)
+    return () => clearTimeout(timer)
+  }, [query, q, type])
+
   const handleSearch = (e: React.FormEvent) => {
     e.preventDefault()
     setParams({ q: query, type })
@@ -45,8 +58,14 @@ export default function SearchPage() {
           placeholder="Search..."
           value={query}
           onChange={(e) => setQuery(e.target.value)}
+          list="search-suggestions"
           className="w-full max-w-lg px-4 py-2.5 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500 focus:border-blue-500 outline-none"
         />
+        <datalist id="search-suggestions">
+          {suggestions.map((s) => (
+            <option key={`${s.type}-${s.id}`} value={s.name} />
+          ))}
+        </datalist>
       </form>
 
       <div className="flex gap-2 mb-6">
@@ -1,7 +1,22 @@
 import { useEffect, useState } from 'react'
-import { getSyncSources, addSyncSource, deleteSyncSource, triggerSync, adminImport } from '../../api/client'
+import { getSyncSources, addSyncSource, deleteSyncSource, triggerSync, adminImport, getImportJob } from '../../api/client'
 
-interface SyncSource { id: number; git_url: string; last_synced_at?: string }
+interface SyncSource { id: number; git_url: string; last_synced_at?: string; last_error?: string }
+interface ImportJob {
+  id: number; status: string; discovered: number; added: number; updated: number
+  unchanged: number; failed: number; skipped: boolean; error?: string
+}
+
+// Import and sync run as background jobs; poll until the job finishes
+async function waitForJob(job: ImportJob, onProgress?: (job: ImportJob) => void): Promise<ImportJob> {
+  while (job.status === 'queued' || job.status === 'running') {
+    onProgress?.(job)
+    await new Promise((resolve) => setTimeout(resolve, 1000))
+    job = await getImportJob(job.id) as ImportJob
+  }
+  if (job.status === 'failed') throw new Error(job.error || 'Import failed')
+  return job
+}
 
 export default function AdminSyncSources() {
   const [sources, setSources] = useState<SyncSource[]>([])
@@ -29,8 +44,12 @@ export default function AdminSyncSources() {
 
   const handleSync = async (id: number) => {
     setSyncing(id)
-    try { await triggerSync(id); load() }
-    finally { setSyncing(null) }
+    try {
+      const job = await waitForJob(await triggerSync(id) as ImportJob)
+      setMsg(job.skipped ? 'Already up to date' : `Synced: ${job.added} added, ${job.updated} updated`)
+    } catch (err) {
+      setMsg(err instanceof Error ? err.message : 'Sync failed')
+    } finally { setSyncing(null); load() }
   }
 
   const handleImport = async (e: React.FormEvent) => {
@@ -38,8 +57,9 @@ export default function AdminSyncSources() {
     if (!importUrl.trim()) return
     setMsg('Importing...')
     try {
-      const result = await adminImport(importUrl) as unknown[]
-      setMsg(`Imported ${result.length} skill(s)`)
+      const job = await waitForJob(await adminImport(importUrl) as ImportJob,
+        (j) => setMsg(j.discovered ? `Importing... ${j.added + j.updated + j.unchanged}/${j.discovered}` : 'Importing...'))
+      setMsg(`Imported ${job.added} new, ${job.updated} updated skill(s)`)
       setImportUrl('')
     } catch (err) {
       setMsg(err instanceof Error ? err.message : 'Import failed')
@@ -77,6 +97,7 @@ export default function AdminSyncSources() {
             <div>
               <div className="text-sm font-medium text-gray-900">{s.git_url}</div>
               {s.last_synced_at && <div className="text-xs text-gray-400">Last synced: {s.last_synced_at}</div>}
+              {s.last_error && <div className="text-xs text-red-500">Last error: {s.last_error}</div>}
             </div>
             <div className="flex gap-2">
               <button onClick={() => handleSync(s.id)} disabled={syncing === s.id}
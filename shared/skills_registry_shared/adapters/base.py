@@ -3,6 +3,8 @@
 from abc import ABC, abstractmethod
 from enum import Enum
 from pathlib import Path
+from typing import BinaryIO
+
 from pydantic import BaseModel
 
 from ..schemas.agent import AgentInstallPackage
@@ -54,6 +56,16 @@ class BaseAdapter(ABC):
     ) -> Path:
         """Install skill files to the agent's skills directory."""
 
+    @abstractmethod
+    def install_skill_archive(
+        self,
+        archive: BinaryIO,
+        name: str,
+        scope: Scope,
+        method: InstallMethod,
+    ) -> Path:
+        """Install a skill from a streamed .tar.gz package (binary files included)."""
+
     @abstractmethod
     def install_mcp(self, config: dict, scope: Scope) -> None:
         """Merge MCP server config into the agent's mcp.json."""
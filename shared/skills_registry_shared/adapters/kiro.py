@@ -3,7 +3,10 @@
 import json
 import os
 import shutil
-from pathlib import Path
+import tarfile
+import uuid
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO
 
 from .base import BaseAdapter, Scope, InstallMethod, InstallSummary
 from ..schemas.agent import AgentInstallPackage
@@ -50,14 +53,7 @@ class KiroAdapter(BaseAdapter):
                 file_path = cache_dir / rel_path
                 file_path.parent.mkdir(parents=True, exist_ok=True)
                 file_path.write_text(content, encoding="utf-8")
-            # Create symlink
-            target_dir.parent.mkdir(parents=True, exist_ok=True)
-            if target_dir.is_symlink() or target_dir.exists():
-                if target_dir.is_symlink():
-                    target_dir.unlink()
-                else:
-                    shutil.rmtree(target_dir)
-            target_dir.symlink_to(cache_dir.resolve())
+            self._link(target_dir, cache_dir)
         else:
             # Direct copy
             if target_dir.exists():
@@ -70,6 +66,70 @@ class KiroAdapter(BaseAdapter):
 
         return target_dir
 
+    def install_skill_archive(
+        self,
+        archive: BinaryIO,
+        name: str,
+        scope: Scope,
+        method: InstallMethod,
+    ) -> Path:
+        target_dir = self.get_skills_dir(scope) / name
+        dest = Path(CACHE_DIR) / name if method == InstallMethod.SYMLINK else target_dir
+        dest.parent.mkdir(parents=True, exist_ok=True)
+
+        # Extract next to dest and swap it in only once the whole archive was read,
+        # so a broken download or a rejected member leaves the old install intact
+        staging = dest.parent / f".{name}.new-{uuid.uuid4().hex}"
+        staging.mkdir()
+        try:
+            # Stream mode — members are extracted one at a time, never held in memory
+            with tarfile.open(fileobj=archive, mode="r|gz") as tar:
+                for member in tar:
+                    rel = PurePosixPath(member.name)
+                    if rel.is_absolute() or ".." in rel.parts:
+                        raise ValueError(f"Unsafe path in skill archive: {member.name}")
+                    if not member.isfile():
+                        continue
+                    file_path = staging / rel
+                    file_path.parent.mkdir(parents=True, exist_ok=True)
+                    with tar.extractfile(member) as src, open(file_path, "wb") as out:
+                        shutil.copyfileobj(src, out)
+            self._replace_dir(staging, dest)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        if method == InstallMethod.SYMLINK:
+            self._link(target_dir, dest)
+        return target_dir
+
+    def _replace_dir(self, new_dir: Path, dest: Path) -> None:
+        """Move ``new_dir`` to ``dest``, replacing whatever is there."""
+        if dest.is_symlink() or dest.is_file():
+            dest.unlink()
+        elif dest.exists():
+            # os.replace cannot overwrite a non-empty directory: move the old one aside first
+            old = dest.parent / f".{dest.name}.old-{uuid.uuid4().hex}"
+            os.replace(dest, old)
+            try:
+                os.replace(new_dir, dest)
+            except OSError:
+                os.replace(old, dest)
+                raise
+            shutil.rmtree(old, ignore_errors=True)
+            return
+        os.replace(new_dir, dest)
+
+    def _link(self, target_dir: Path, cache_dir: Path) -> None:
+        """Point the skill directory at its cached copy, replacing any existing install."""
+        target_dir.parent.mkdir(parents=True, exist_ok=True)
+        if target_dir.is_symlink() or target_dir.exists():
+            if target_dir.is_symlink():
+                target_dir.unlink()
+            else:
+                shutil.rmtree(target_dir)
+        target_dir.symlink_to(cache_dir.resolve())
+
     def install_mcp(self, config: dict, scope: Scope) -> None:
         mcp_path = self.get_mcp_config_path(scope)
         mcp_path.parent.mkdir(parents=True, exist_ok=True)
@@ -10,7 +10,7 @@ from .agent import (
     EmbeddedMCP,
 )
 from .user import UserCreate, UserResponse, UserBrief, APIKeyResponse
-from .common import PaginatedResult, SearchRequest
+from .common import PaginatedResult, SearchRequest, SearchSuggestion
 
 __all__ = [
     "SkillCreate", "SkillResponse", "SkillInstallPackage", "SkillMetadata",
@@ -18,5 +18,5 @@ __all__ = [
     "AgentConfigCreate", "AgentConfigResponse", "AgentInstallPackage",
     "EmbeddedSkill", "EmbeddedMCP",
     "UserCreate", "UserResponse", "UserBrief", "APIKeyResponse",
-    "PaginatedResult", "SearchRequest",
+    "PaginatedResult", "SearchRequest", "SearchSuggestion",
 ]
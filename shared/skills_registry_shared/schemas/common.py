@@ -8,10 +8,18 @@ T = TypeVar("T")
 
 class PaginatedResult(BaseModel, Generic[T]):
     items: list[T]
-    total: int
+    total: int | None  # None when the caller asked for total=none
     page: int
     size: int
-    pages: int
+    pages: int | None
+    has_more: bool = False
+    next_cursor: str | None = None  # pass as ?cursor= for the next page
+
+
+class SearchSuggestion(BaseModel):
+    id: int
+    name: str
+    type: str  # skill | mcp | agent
 
 
 class SearchRequest(BaseModel):